@@ -1,55 +1,127 @@
-from passlib.context import CryptContext
-from datetime import datetime, timedelta
-from jose import JWTError, jwt
+import os
+import re
+import secrets
+import threading
+import time
+from functools import lru_cache
+import anyio
+import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import TTLCache
+from datetime import timedelta
+import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from app.database import SessionLocal
+from sqlalchemy.orm import Session
+from app.database import get_db
 from app.models import User
 from app.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# argon2id via argon2-cffi directly; hashes from before the migration are bcrypt
+# ("$2b$...") and are verified natively, then upgraded on login
+_ph = PasswordHasher(
+    time_cost=settings.argon2_time_cost,
+    memory_cost=settings.argon2_memory_cost,
+    parallelism=settings.argon2_parallelism
+)
+
+# Verified against when a login email is unknown, so that path costs the same as a wrong
+# password; computed once at import instead of hashing on every probe
+DUMMY_HASH = _ph.hash(secrets.token_urlsafe(16))
+
+@lru_cache(maxsize=256)
+def _dev_hash_password(password: str) -> str:
+    return _ph.hash(password)
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    # Seed scripts and tests create many users with the same password; in dev they share
+    # one hash. Never enable outside dev: cached hashes reuse the same salt
+    if settings.env == "dev":
+        return _dev_hash_password(password)
+    return _ph.hash(password)
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+    if hashed.startswith("$2"):
+        return bcrypt.checkpw(password.encode(), hashed.encode())
+    try:
+        return _ph.verify(hashed, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+def verify_and_update_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    """Verify a password, returning a replacement hash when the stored one is outdated."""
+    if not verify_password(password, hashed):
+        return False, None
+    if hashed.startswith("$2") or _ph.check_needs_rehash(hashed):
+        return True, hash_password(password)
+    return True, None
+
+# Hashing is CPU-bound: async endpoints run it on worker threads from a dedicated limiter,
+# so a burst of logins neither blocks the event loop nor starves the shared threadpool
+_hash_limiter = anyio.CapacityLimiter(max(4, os.cpu_count() or 1))
+
+async def ahash_password(password: str) -> str:
+    return await anyio.to_thread.run_sync(hash_password, password, limiter=_hash_limiter)
+
+async def averify_and_update_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    return await anyio.to_thread.run_sync(verify_and_update_password, password, hashed, limiter=_hash_limiter)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
-    to_encode = data.copy()
-    
-    expire = datetime.utcnow() + (
-        expires_delta or timedelta(minutes=settings.access_token_expire_minutes)
-    )
+    # exp is an integer NumericDate; no datetime round-trip needed
+    lifetime = int(expires_delta.total_seconds()) if expires_delta else settings.access_token_expire_minutes * 60
+    expire = int(time.time()) + lifetime
     
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+    return jwt.encode({**data, "exp": expire}, settings.secret_key, algorithm=settings.algorithm)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+# Decoded payloads keyed by the raw token; its signature uniquely identifies the payload
+_token_cache = TTLCache(maxsize=2048, ttl=30)
+_token_cache_lock = threading.Lock()
+
+# Authenticated users keyed by id, so protected requests skip the identity query
+_user_cache = TTLCache(maxsize=4096, ttl=60)
+_user_cache_lock = threading.Lock()
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        user_id: int = payload.get("user_id")
+    with _token_cache_lock:
+        payload = _token_cache.get(token)
 
-        if user_id is None:
+    # Never serve a cached payload past its expiry; re-decoding rejects it
+    if payload is None or payload.get("exp", 0) <= time.time():
+        try:
+            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        except jwt.InvalidTokenError:
             raise credentials_exception
 
-    except JWTError:
+        with _token_cache_lock:
+            _token_cache[token] = payload
+
+    user_id: int = payload.get("user_id")
+    if user_id is None:
         raise credentials_exception
 
-    db = SessionLocal()
-    user = db.query(User).filter(User.id == user_id).first()
-    db.close()
+    with _user_cache_lock:
+        user = _user_cache.get(user_id)
 
     if user is None:
-        raise credentials_exception
+        user = db.query(User).filter(User.id == user_id).first()
+
+        if user is None:
+            raise credentials_exception
+
+        # Detach before caching so the request's later commits don't expire it
+        db.expunge(user)
+
+        with _user_cache_lock:
+            _user_cache[user_id] = user
 
     return user
 
@@ -66,14 +138,8 @@ def member_required(user: User = Depends(get_current_user)):
         )
     return user
 
+_PASSWORD_CLASSES = (re.compile(r"[A-Z]"), re.compile(r"[a-z]"), re.compile(r"\d"))
+
 def validate_password_strength(password: str) -> bool:
     """Validate password meets security requirements"""
-    if len(password) < 8:
-        return False
-    if not any(c.isupper() for c in password):
-        return False
-    if not any(c.islower() for c in password):
-        return False
-    if not any(c.isdigit() for c in password):
-        return False
-    return True
\ No newline at end of file
+    return len(password) >= 8 and all(pattern.search(password) for pattern in _PASSWORD_CLASSES)
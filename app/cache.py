@@ -0,0 +1,76 @@
+import logging
+import secrets
+import threading
+import time
+import redis
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Response cache for the charger read endpoints. Redis is optional: without REDIS_URL
+# every lookup misses, so the API works the same uncached
+CACHE_TTL = 60
+
+# Charger keys and ETags embed a generation; writes bump it instead of deleting keys, so
+# invalidation is a single INCR and entries from older generations just expire
+CHARGER_GEN_KEY = "chargers:gen"
+
+redis_client = redis.Redis.from_url(
+    settings.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5
+) if settings.redis_url else None
+
+# Without Redis the generation lives in this process only. Writes made by other processes
+# don't bump it, so it is tagged with this process and rolls over every CACHE_TTL seconds
+_process_token = secrets.token_hex(4)
+_local_generation = 0
+_local_generation_lock = threading.Lock()
+
+def charger_generation() -> str:
+    """Return the current charger data generation."""
+    if redis_client is not None:
+        try:
+            generation = redis_client.get(CHARGER_GEN_KEY)
+            if generation is None:
+                # Seed with the clock so a restarted Redis never hands out an old generation
+                redis_client.set(CHARGER_GEN_KEY, time.time_ns() // 1_000_000, nx=True)
+                generation = redis_client.get(CHARGER_GEN_KEY)
+            if generation is not None:
+                return generation.decode()
+        except redis.RedisError as e:
+            logger.error(f"Redis get failed for {CHARGER_GEN_KEY}: {e}")
+    return f"{_process_token}.{_local_generation}.{int(time.time() // CACHE_TTL)}"
+
+def charger_cache_key(generation: str, suffix: str) -> str:
+    """Build a charger cache key under the given generation."""
+    return f"chargers:{generation}:{suffix}"
+
+def cache_get(key: str) -> bytes | None:
+    """Return a cached JSON response body, or None on a miss or Redis error."""
+    if redis_client is None:
+        return None
+    try:
+        return redis_client.get(key)
+    except redis.RedisError as e:
+        logger.error(f"Redis get failed for {key}: {e}")
+        return None
+
+def cache_set(key: str, body: bytes):
+    """Store a JSON response body for CACHE_TTL seconds."""
+    if redis_client is None:
+        return
+    try:
+        redis_client.setex(key, CACHE_TTL, body)
+    except redis.RedisError as e:
+        logger.error(f"Redis set failed for {key}: {e}")
+
+def invalidate_charger_cache():
+    """Start a new charger generation after a write that changes charger responses."""
+    global _local_generation
+    with _local_generation_lock:
+        _local_generation += 1
+    if redis_client is None:
+        return
+    try:
+        redis_client.incr(CHARGER_GEN_KEY)
+    except redis.RedisError as e:
+        logger.error(f"Redis invalidation failed: {e}")
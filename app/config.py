@@ -6,8 +6,18 @@ class Settings(BaseSettings):
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
+    # argon2id cost; tune on the deployment host so a verify takes ~200-500 ms
+    argon2_time_cost: int = 1
+    argon2_memory_cost: int = 46 * 1024  # KiB
+    argon2_parallelism: int = 1
     openchargemap_api_key: str
     openrouteservice_api_key: str
+    # OpenRouteService responses cached in memory, keyed on coordinates rounded to this many decimals
+    route_cache_precision: int = 4
+    route_cache_size: int = 50_000
+    route_cache_ttl: int = 86400  # seconds
+    redis_url: str | None = None  # enables the response cache when set
+    env: str = "production"  # "dev" enables development-only shortcuts
     
     class Config:
         env_file = ".env"
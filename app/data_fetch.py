@@ -1,24 +1,30 @@
 # data_fetch.py
 import requests
 import os
+import orjson
 from dotenv import load_dotenv
-from app.models import Charger, Base
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import Charger, normalize_connector_type
 from app.database import SessionLocal, engine
+from app.migrations import init_database
+from app.cache import invalidate_charger_cache
 
 load_dotenv()
 API_KEY = os.getenv("OPENCHARGEMAP_API_KEY")
+BATCH_SIZE = 1000
 
-# Create tables if they don't exist
-Base.metadata.create_all(bind=engine)
+# Create tables if they don't exist and upgrade older ones
+init_database()
 
 def fetch_chargers(country_code="TN", max_results=100):
     url = "https://api.openchargemap.io/v3/poi/"
     params = {"countrycode": country_code, "maxresults": max_results, "key": API_KEY}
     response = requests.get(url, params=params)
-    return response.json()
+    # orjson parses the full POI feed several times faster than the stdlib decoder
+    return orjson.loads(response.content)
 
 def save_chargers_to_db(data):
-    db = SessionLocal()
+    rows = []
 
     for item in data:
         info = item.get("AddressInfo", {})
@@ -36,19 +42,28 @@ def save_chargers_to_db(data):
 
         connector_type = ", ".join(connector_titles) if connector_titles else "Unknown"
 
-        charger = Charger(
-            name=info.get("Title", "Unknown"),
-            city=info.get("Town", "Unknown"),
-            latitude=info.get("Latitude", 0),
-            longitude=info.get("Longitude", 0),
-            usage_type=usage.get("Title", "Unknown"),
-            connector_type=connector_type
-        )
+        rows.append({
+            "external_id": item.get("ID"),
+            "name": info.get("Title", "Unknown"),
+            "city": info.get("Town", "Unknown"),
+            "latitude": info.get("Latitude", 0),
+            "longitude": info.get("Longitude", 0),
+            "usage_type": usage.get("Title", "Unknown"),
+            "connector_type": connector_type,
+            "connector_type_norm": normalize_connector_type(connector_type)
+        })
 
-        db.add(charger)
+    # Bulk insert; chargers already imported under the same OpenChargeMap ID are skipped
+    insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(Charger).on_conflict_do_nothing(index_elements=["external_id"])
 
+    db = SessionLocal()
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(stmt, rows[start:start + BATCH_SIZE])
     db.commit()
     db.close()
+    # Only reaches the API processes through Redis; without it their ETags expire within CACHE_TTL
+    invalidate_charger_cache()
 
 
 if __name__ == "__main__":
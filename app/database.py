@@ -2,8 +2,21 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import settings
 
-engine = create_engine(settings.database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Server databases get a sized pool with pre-ping so connections are reused and stale ones
+# replaced; SQLite keeps SQLAlchemy's default pool
+if settings.database_url.startswith("sqlite"):
+    engine = create_engine(settings.database_url)
+else:
+    engine = create_engine(
+        settings.database_url,
+        pool_size=20,
+        max_overflow=10,
+        pool_pre_ping=True,
+        pool_recycle=3600
+    )
+# Objects stay usable after commit; ids and Python-side defaults are already set
+# at flush, so writes don't need a refresh SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
 def get_db():
@@ -0,0 +1,70 @@
+import math
+import numpy as np
+
+# numba is optional: when installed, distances are computed by one fused loop instead of
+# NumPy's chain of temporary arrays. The loop is deliberately serial: it is called from
+# request threads, where numba's own thread pool would oversubscribe the CPU and, with the
+# workqueue threading layer, abort the process on concurrent calls
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# scikit-learn is optional too: a ball tree answers radius queries without scanning every charger
+try:
+    from sklearn.neighbors import BallTree
+except ImportError:
+    BallTree = None
+
+R = 6371.0
+
+if njit is not None:
+    @njit(fastmath=True, cache=True)
+    def _haversine_batch(lat, lon, lats, lons, out):
+        # Terms that only depend on the origin are computed once, outside the loop
+        lat1_rad = math.radians(lat)
+        cos_lat1 = math.cos(lat1_rad)
+        for i in range(lats.shape[0]):
+            lat2_rad = math.radians(lats[i])
+            half_dlat = (lat2_rad - lat1_rad) * 0.5
+            half_dlon = math.radians(lons[i] - lon) * 0.5
+            a = math.sin(half_dlat)**2 + cos_lat1 * math.cos(lat2_rad) * math.sin(half_dlon)**2
+            out[i] = 2 * R * math.asin(math.sqrt(a))
+
+def haversine_many(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Vectorized haversine distance in kilometers from one point to many."""
+    if njit is not None:
+        out = np.empty(lats.shape[0], dtype=np.float64)
+        _haversine_batch(lat, lon, lats, lons, out)
+        return out
+
+    lats_rad = np.radians(lats)
+    delta_lat = lats_rad - math.radians(lat)
+    delta_lon = np.radians(lons - lon)
+
+    a = np.sin(delta_lat * 0.5)**2 + math.cos(math.radians(lat)) * np.cos(lats_rad) * np.sin(delta_lon * 0.5)**2
+    return 2 * R * np.arcsin(np.sqrt(a))
+
+def build_index(lats: np.ndarray, lons: np.ndarray):
+    """Ball tree over the coordinates, or None when scikit-learn isn't installed."""
+    if BallTree is None or lats.size == 0:
+        return None
+    return BallTree(np.radians(np.column_stack([lats, lons])), metric="haversine")
+
+def points_within_radius(index, lat: float, lon: float, lats: np.ndarray, lons: np.ndarray,
+                         radius_km: float) -> tuple[np.ndarray, np.ndarray]:
+    """Indices of the points within radius_km of (lat, lon) and their distances in kilometers."""
+    if index is not None:
+        idx, dist = index.query_radius(np.radians([[lat, lon]]), r=radius_km / R, return_distance=True)
+        return idx[0], dist[0] * R
+
+    # Latitude band prefilter: great-circle distance is never less than R * |dlat|, so this
+    # drops far points with one subtraction each and no trig; haversine runs on the rest
+    idx = np.flatnonzero(np.abs(lats - lat) <= math.degrees(radius_km / R))
+    distances = haversine_many(lat, lon, lats[idx], lons[idx])
+    keep = distances <= radius_km
+    return idx[keep], distances[keep]
+
+def warmup():
+    """Compile the numba kernels ahead of the first request."""
+    haversine_many(0.0, 0.0, np.zeros(1), np.zeros(1))
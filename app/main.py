@@ -1,46 +1,87 @@
 # use: uvicorn app.main:app --reload
-import json
+from contextlib import asynccontextmanager
 import logging
-from typing import List
+from typing import List, NamedTuple
 from datetime import datetime, timedelta
-from app.models import User, Review, Charger, Vehicle, Favorite, Trip, ChargerReport
-from app.auth_utils import member_required, hash_password, verify_password, validate_password_strength, get_current_user
+from app.models import User, Review, Charger, Vehicle, Favorite, Trip, ChargerReport, normalize_connector_type, utcnow
+from app.auth_utils import member_required, ahash_password, averify_and_update_password, validate_password_strength, get_current_user
 from app import schemas
-from fastapi import FastAPI, Depends, Query, HTTPException, status, Request
+from fastapi import FastAPI, Depends, Query, HTTPException, status, Request, Response, BackgroundTasks
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from app.auth_utils import create_access_token
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+from app.auth_utils import create_access_token, DUMMY_HASH
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import func, and_, select, exists, update
+from sqlalchemy.dialects import postgresql, sqlite
 from app.database import SessionLocal, Base, engine, get_db
+from app.migrations import init_database
 from app.config import settings
+from app.cache import CACHE_TTL, cache_get, cache_set, charger_cache_key, charger_generation, invalidate_charger_cache
+from app.geo import build_index, haversine_many, points_within_radius, warmup as warmup_haversine
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-import requests
+import asyncio
+import anyio
+import httpx
 import math
+import threading
+import time
+import numpy as np
+import orjson
+from cachetools import TTLCache
 
 # Logging setup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create tables if they don't exist
-try:
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created successfully")
-except Exception as e:
-    logger.error(f"Database initialization error: {e}")
-    # Continue anyway - tables might already exist
-
-# Initialize app
+# Compile the optional numba distance kernel before the first request
+warmup_haversine()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared OpenRouteService client: keep-alive connections amortize TCP+TLS setup across calls
+    app.state.http = httpx.AsyncClient(
+        base_url="https://api.openrouteservice.org",
+        headers={"Authorization": settings.openrouteservice_api_key},
+        timeout=10,
+        # Connection attempts are retried; failed routes already fall back to haversine
+        transport=httpx.AsyncHTTPTransport(
+            retries=2,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        )
+    )
+    # Schema setup and the coordinate preload run once per worker at startup rather than
+    # at import, off the event loop
+    await anyio.to_thread.run_sync(init_database)
+    await anyio.to_thread.run_sync(warm_charger_coords)
+    yield
+    await app.state.http.aclose()
+    engine.dispose()
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson; list endpoints return it directly to skip jsonable_encoder."""
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+# Initialize app; every response is rendered with orjson
 app = FastAPI(
     title="EV Charging Tunisia API",
     description="Community-driven EV charging station finder in Tunisia",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# Rate limiting
-limiter = Limiter(key_func=get_remote_address)
+# Rate limiting; counters live in Redis when configured so every worker shares the same limits
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.redis_url or "memory://",
+    strategy="fixed-window",
+    in_memory_fallback_enabled=bool(settings.redis_url)
+)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -52,37 +93,162 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Charger lists are repetitive JSON and shrink several times over when compressed
+app.add_middleware(GZipMiddleware, minimum_size=500)
 
 # ============= UTILITY FUNCTIONS =============
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Calculate straight-line distance between two points in kilometers."""
-    R = 6371
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-    
-    a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    distance = R * c
-    
-    return round(distance, 2)
-
-def calculate_driving_distance(start_lat: float, start_lon: float, 
-                                end_lat: float, end_lon: float) -> dict | None:
+# Columns serialized by the charger list endpoints; selecting them directly skips ORM hydration
+CHARGER_COLUMNS = (
+    Charger.id, Charger.name, Charger.city, Charger.latitude, Charger.longitude,
+    Charger.usage_type, Charger.connector_type, Charger.status,
+    Charger.avg_rating, Charger.review_count, Charger.report_count
+)
+
+def charger_etag(generation: str) -> str:
+    """Weak ETag for charger responses; it changes whenever a write starts a new generation."""
+    return f'W/"{generation}"'
+
+def caching_headers(etag: str) -> dict:
+    # Clients and CDNs may reuse a response for CACHE_TTL seconds even across writes;
+    # after that they revalidate with If-None-Match, which is answered without any queries
+    return {"ETag": etag, "Cache-Control": f"public, max-age={CACHE_TTL}"}
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against etag: "*", comma-separated lists and weak comparison (RFC 9110)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    opaque = etag.removeprefix("W/")
+    return header.strip() == "*" or any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+def etag_response(body: bytes, etag: str) -> Response:
+    """Serve a JSON body with its ETag."""
+    return Response(body, media_type="application/json", headers=caching_headers(etag))
+
+def refresh_review_stats(db: Session, charger_id: int):
+    """Recompute a charger's stored rating aggregates from its reviews."""
+    charger_reviews = Review.charger_id == charger_id
+    db.query(Charger).filter(Charger.id == charger_id).update({
+        "avg_rating": select(func.avg(Review.rating)).where(charger_reviews).scalar_subquery(),
+        "review_count": select(func.count(Review.id)).where(charger_reviews).scalar_subquery()
+    }, synchronize_session=False)
+
+# Straight-line duration estimate at an average 50 km/h
+MINUTES_PER_KM = 60 / 50
+
+def add_and_commit(db: Session, obj):
+    """Insert a row in its own transaction."""
+    db.add(obj)
+    db.commit()
+
+def charger_exists(db: Session, charger_id: int) -> bool:
+    """Check a charger exists without loading the row."""
+    return db.query(exists().where(Charger.id == charger_id)).scalar()
+
+def insert_ignoring_conflicts(db: Session, model):
+    """INSERT that skips rows violating a unique constraint (ON CONFLICT DO NOTHING)."""
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    return insert(model).on_conflict_do_nothing()
+
+def connector_matches(connector_type: str):
+    """SQL condition matching a connector type, ignoring case, spaces and dashes."""
+    return Charger.connector_type_norm.contains(normalize_connector_type(connector_type), autoescape=True)
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> tuple:
+    """Smallest lat/lon box containing every point within radius_km of (lat, lon)."""
+    angular = radius_km / 6371
+    dlat = math.degrees(angular)
+    if abs(lat) + dlat >= 90:
+        # The circle reaches a pole, so every longitude is in range
+        return lat - dlat, lat + dlat, -180.0, 180.0
+    dlon = math.degrees(math.asin(math.sin(angular) / math.cos(math.radians(lat))))
+    if lon - dlon < -180 or lon + dlon > 180:
+        # The box crosses the antimeridian; fall back to every longitude rather than wrap
+        return lat - dlat, lat + dlat, -180.0, 180.0
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+def haversine_sql(lat: float, lon: float):
+    """SQL expression for the haversine distance in kilometers from a point to each charger."""
+    R = 6371.0
+    delta_lat = func.radians(Charger.latitude - lat)
+    delta_lon = func.radians(Charger.longitude - lon)
+    
+    a = func.power(func.sin(delta_lat * 0.5), 2) + math.cos(math.radians(lat)) * func.cos(func.radians(Charger.latitude)) * func.power(func.sin(delta_lon * 0.5), 2)
+    # least() guards asin against rounding pushing sqrt(a) just above 1
+    return 2 * R * func.asin(func.least(func.sqrt(a), 1.0))
+
+# Chargers only change when data_fetch.py runs in its own process, so their coordinates are
+# kept in memory as contiguous arrays and reloaded only once CHARGER_COORDS_TTL expires;
+# newly imported chargers can take up to that long to show up in nearby searches
+class ChargerCoords(NamedTuple):
+    ids: np.ndarray
+    lats: np.ndarray
+    lons: np.ndarray
+    index: object  # BallTree when scikit-learn is installed, else None
+    loaded_at: float
+
+CHARGER_COORDS_TTL = 300
+_charger_coords = None
+
+def get_charger_coords(db: Session) -> ChargerCoords:
+    """Return the cached charger coordinate arrays, reloading them when stale."""
+    global _charger_coords
+    coords = _charger_coords
+    if coords is None or time.monotonic() - coords.loaded_at > CHARGER_COORDS_TTL:
+        rows = db.query(Charger.id, Charger.latitude, Charger.longitude).all()
+        coords = ChargerCoords(
+            ids=np.fromiter((r.id for r in rows), dtype=np.int64, count=len(rows)),
+            lats=np.fromiter((r.latitude for r in rows), dtype=np.float64, count=len(rows)),
+            lons=np.fromiter((r.longitude for r in rows), dtype=np.float64, count=len(rows)),
+            index=None,
+            loaded_at=time.monotonic()
+        )
+        coords = coords._replace(index=build_index(coords.lats, coords.lons))
+        # Swap in a complete snapshot so concurrent readers never see mixed arrays
+        _charger_coords = coords
+    return coords
+
+def warm_charger_coords():
+    """Load the coordinate arrays up front so the first nearby request doesn't pay for it."""
+    if engine.dialect.name == "postgresql":
+        return  # nearby distances are computed in SQL there
+    db = SessionLocal()
+    try:
+        get_charger_coords(db)
+    except Exception as e:
+        logger.error(f"Charger coordinate preload failed: {e}")
+    finally:
+        db.close()
+
+# Keeps concurrent OpenRouteService calls within its rate limits
+ors_semaphore = asyncio.Semaphore(8)
+
+# Chargers don't move, so routes between nearby coordinates (4 decimals is ~11 m) can be
+# reused for a day. Only touched from the event loop, so no lock is needed
+route_cache = TTLCache(maxsize=settings.route_cache_size, ttl=settings.route_cache_ttl)
+
+def route_cache_key(start_lat: float, start_lon: float, end_lat: float, end_lon: float) -> tuple:
+    p = settings.route_cache_precision
+    return (round(start_lat, p), round(start_lon, p), round(end_lat, p), round(end_lon, p))
+
+async def calculate_driving_distance(start_lat: float, start_lon: float, 
+                                     end_lat: float, end_lon: float) -> dict | None:
     """Calculate driving distance using OpenRouteService API with fallback."""
-    url = "https://api.openrouteservice.org/v2/directions/driving-car"
+    key = route_cache_key(start_lat, start_lon, end_lat, end_lon)
+    cached = route_cache.get(key)
+    if cached is not None:
+        return cached
     
-    headers = {"Authorization": settings.openrouteservice_api_key}
     params = {
         "start": f"{start_lon},{start_lat}",
         "end": f"{end_lon},{end_lat}"
     }
     
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        async with ors_semaphore:
+            response = await app.state.http.get("/v2/directions/driving-car", params=params)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         
         if not data.get("features"):
             logger.warning("No route found in OpenRouteService response")
@@ -92,57 +258,120 @@ def calculate_driving_distance(start_lat: float, start_lon: float,
         distance_meters = summary["distance"]
         duration_seconds = summary["duration"]
         
-        return {
+        route_cache[key] = {
             "distance_km": round(distance_meters / 1000, 2),
             "duration_minutes": round(duration_seconds / 60, 1)
         }
-    except requests.exceptions.Timeout:
+        return route_cache[key]
+    except httpx.TimeoutException:
         logger.error("OpenRouteService API timeout - using haversine fallback")
         return None
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Routing API error: {e}")
         return None
 
-def update_charger_status(charger_id: int, db: Session):
-    """Update charger status based on recent reports."""
-    charger = db.query(Charger).filter(Charger.id == charger_id).first()
-    if not charger:
-        return
+async def calculate_driving_matrix(start_lat: float, start_lon: float,
+                                   destinations: list[tuple[float, float]]) -> list[dict | None]:
+    """Calculate driving distances from one origin to many destinations in a single matrix call."""
+    keys = [route_cache_key(start_lat, start_lon, end_lat, end_lon) for end_lat, end_lon in destinations]
+    routes = [route_cache.get(key) for key in keys]
     
-    # Get reports from last 7 days
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    recent_reports = db.query(ChargerReport).filter(
-        and_(
-            ChargerReport.charger_id == charger_id,
-            ChargerReport.created_at >= seven_days_ago
-        )
-    ).all()
+    # Only destinations without a cached route go to the API
+    missing = [i for i, route in enumerate(routes) if route is None]
+    if not missing:
+        return routes
     
-    if not recent_reports:
-        charger.status = "unknown"
-        charger.status_updated_at = datetime.utcnow()
-        db.commit()
-        return
+    body = {
+        "locations": [[start_lon, start_lat]] + [[destinations[i][1], destinations[i][0]] for i in missing],
+        "sources": [0],
+        "destinations": list(range(1, len(missing) + 1)),
+        "metrics": ["distance", "duration"]
+    }
     
-    # Count reports by type
-    status_counts = {}
-    for r in recent_reports:
-        status_counts[r.issue_type] = status_counts.get(r.issue_type, 0) + 1
+    try:
+        async with ors_semaphore:
+            response = await app.state.http.post("/v2/matrix/driving-car", json=body)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        
+        distances = data["distances"][0]
+        durations = data["durations"][0]
+    except httpx.TimeoutException:
+        logger.error("OpenRouteService matrix API timeout - using haversine fallback")
+        return routes
+    except (httpx.HTTPError, KeyError, IndexError) as e:
+        logger.error(f"Routing matrix API error: {e}")
+        return routes
+    
+    for i, distance_meters, duration_seconds in zip(missing, distances, durations):
+        # Unreachable destinations come back as null
+        if distance_meters is None or duration_seconds is None:
+            continue
+        routes[i] = route_cache[keys[i]] = {
+            "distance_km": round(distance_meters / 1000, 2),
+            "duration_minutes": round(duration_seconds / 60, 1)
+        }
+    
+    return routes
+
+def recent_report_counts(charger_id: int, db: Session) -> dict:
+    """Count a charger's reports from the last 7 days by issue type."""
+    seven_days_ago = datetime.utcnow() - timedelta(days=7)
+    return dict(
+        db.query(ChargerReport.issue_type, func.count(ChargerReport.id)).filter(
+            and_(
+                ChargerReport.charger_id == charger_id,
+                ChargerReport.created_at >= seven_days_ago
+            )
+        ).group_by(ChargerReport.issue_type).all()
+    )
+
+def update_charger_status(charger_id: int, db: Session):
+    """Update charger status based on recent reports (the caller commits)."""
+    status_counts = recent_report_counts(charger_id, db)
     
     # Determine status (majority vote, with priority: broken > occupied > under_construction > working)
     if status_counts.get("broken", 0) > 0 and status_counts.get("broken", 0) >= status_counts.get("working", 0):
-        charger.status = "broken"
+        new_status = "broken"
     elif status_counts.get("occupied", 0) > status_counts.get("working", 0):
-        charger.status = "occupied"
+        new_status = "occupied"
     elif status_counts.get("under_construction", 0) > status_counts.get("working", 0):
-        charger.status = "under_construction"
+        new_status = "under_construction"
     elif status_counts.get("working", 0) > 0:
-        charger.status = "working"
+        new_status = "working"
     else:
-        charger.status = "unknown"
+        new_status = "unknown"
     
-    charger.status_updated_at = datetime.utcnow()
-    db.commit()
+    db.query(Charger).filter(Charger.id == charger_id).update(
+        {"status": new_status, "status_updated_at": utcnow()},
+        synchronize_session=False
+    )
+
+# Chargers with a status recompute queued; a burst of reports triggers a single recompute
+_status_pending = set()
+_status_pending_lock = threading.Lock()
+
+def schedule_status_update(background_tasks: BackgroundTasks, charger_id: int):
+    """Queue a status recompute after the response unless one is already pending."""
+    with _status_pending_lock:
+        if charger_id in _status_pending:
+            return
+        _status_pending.add(charger_id)
+    background_tasks.add_task(recompute_charger_status, charger_id)
+
+def recompute_charger_status(charger_id: int):
+    """Background task: recompute a charger's status in its own session."""
+    with _status_pending_lock:
+        _status_pending.discard(charger_id)
+    db = SessionLocal()
+    try:
+        update_charger_status(charger_id, db)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Status update failed for charger {charger_id}: {e}")
+    finally:
+        db.close()
+    invalidate_charger_cache()
 
 # ============= HEALTH CHECK =============
 @app.get("/", tags=["Health"])
@@ -161,17 +390,27 @@ def health_check():
 # NOTE: Specific paths (/chargers/search, /chargers/nearby) MUST come before parameterized paths (/chargers/{charger_id})
 # to avoid FastAPI matching "search" as a charger_id
 
-@app.get("/chargers", response_model=dict, tags=["Chargers"])
+@app.get("/chargers", response_model=schemas.PaginatedResponse[schemas.ChargerResponse], tags=["Chargers"])
 @limiter.limit("100/minute")
 def get_chargers(
     request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    status: str | None = Query(None, regex="^(working|broken|occupied|under_construction|unknown)$"),
+    status: schemas.ChargerStatus | None = Query(None),
     db: Session = Depends(get_db)
 ):
     """Get all chargers with pagination and optional status filter."""
-    query = db.query(Charger)
+    # The ETag comes from the data generation, so revalidation is answered before any query
+    generation = charger_generation()
+    etag = charger_etag(generation)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=caching_headers(etag))
+    cache_key = charger_cache_key(generation, f"list:{skip}:{limit}:{status}")
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return etag_response(cached, etag)
+    
+    query = db.query(*CHARGER_COLUMNS)
     
     if status:
         query = query.filter(Charger.status == status)
@@ -181,12 +420,6 @@ def get_chargers(
     
     chargers_with_ratings = []
     for charger in chargers:
-        avg_rating = db.query(func.avg(Review.rating)).filter(
-            Review.charger_id == charger.id
-        ).scalar()
-        review_count = db.query(Review).filter(Review.charger_id == charger.id).count()
-        report_count = db.query(ChargerReport).filter(ChargerReport.charger_id == charger.id).count()
-        
         charger_dict = {
             "id": charger.id,
             "name": charger.name,
@@ -196,34 +429,46 @@ def get_chargers(
             "usage_type": charger.usage_type,
             "connector_type": charger.connector_type,
             "status": charger.status,
-            "avg_rating": round(avg_rating, 2) if avg_rating else None,
-            "review_count": review_count,
-            "report_count": report_count
+            "avg_rating": round(charger.avg_rating, 2) if charger.avg_rating else None,
+            "review_count": charger.review_count,
+            "report_count": charger.report_count
         }
         chargers_with_ratings.append(charger_dict)
     
-    return {
+    body = orjson.dumps({
         "total": total,
         "skip": skip,
         "limit": limit,
         "results": chargers_with_ratings
-    }
+    })
+    cache_set(cache_key, body)
+    return etag_response(body, etag)
 
-@app.get("/chargers/search", tags=["Chargers"])
+@app.get("/chargers/search", response_model=schemas.PaginatedResponse[schemas.ChargerResponse], tags=["Chargers"])
 @limiter.limit("50/minute")
 def search_chargers(
     request: Request,
     city: str | None = Query(None),
     usage_type: str | None = Query(None),
     connector_type: str | None = Query(None),
-    status: str | None = Query(None, regex="^(working|broken|occupied|under_construction|unknown)$"),
+    status: schemas.ChargerStatus | None = Query(None),
     min_rating: float | None = Query(None, ge=0, le=5),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db)
 ):
     """Search chargers with advanced filters."""
-    query = db.query(Charger)
+    # The ETag comes from the data generation, so revalidation is answered before any query
+    generation = charger_generation()
+    etag = charger_etag(generation)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=caching_headers(etag))
+    cache_key = charger_cache_key(generation, f"search:{city}:{usage_type}:{connector_type}:{status}:{min_rating}:{skip}:{limit}")
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return etag_response(cached, etag)
+    
+    query = db.query(*CHARGER_COLUMNS)
     
     if city:
         query = query.filter(Charger.city.ilike(f"%{city}%"))
@@ -234,22 +479,15 @@ def search_chargers(
     if status:
         query = query.filter(Charger.status == status)
     
+    # Filtering by rating in SQL keeps total and pagination consistent
+    if min_rating:
+        query = query.filter(Charger.avg_rating >= min_rating)
+    
     total = query.count()
     chargers = query.offset(skip).limit(limit).all()
     
     results = []
     for charger in chargers:
-        avg_rating = db.query(func.avg(Review.rating)).filter(
-            Review.charger_id == charger.id
-        ).scalar()
-        
-        # Filter by min_rating if specified
-        if min_rating and (avg_rating is None or avg_rating < min_rating):
-            continue
-        
-        review_count = db.query(Review).filter(Review.charger_id == charger.id).count()
-        report_count = db.query(ChargerReport).filter(ChargerReport.charger_id == charger.id).count()
-        
         results.append({
             "id": charger.id,
             "name": charger.name,
@@ -259,82 +497,86 @@ def search_chargers(
             "usage_type": charger.usage_type,
             "connector_type": charger.connector_type,
             "status": charger.status,
-            "avg_rating": round(avg_rating, 2) if avg_rating else None,
-            "review_count": review_count,
-            "report_count": report_count
+            "avg_rating": round(charger.avg_rating, 2) if charger.avg_rating else None,
+            "review_count": charger.review_count,
+            "report_count": charger.report_count
         })
     
-    return {
+    body = orjson.dumps({
         "total": total,
         "skip": skip,
         "limit": limit,
         "results": results
-    }
-
-@app.get("/chargers/nearby", tags=["Chargers"])
-@limiter.limit("30/minute")
-def get_nearby_chargers(
-    request: Request,
-    lat: float = Query(..., ge=-90, le=90),
-    lon: float = Query(..., ge=-180, le=180),
-    connector_type: str | None = Query(None),
-    status: str | None = Query(None, regex="^(working|broken|occupied|under_construction|unknown)$"),
-    min_rating: float | None = Query(None, ge=0, le=5),
-    limit: int = Query(10, ge=1, le=27),
-    radius_km: float = Query(100, ge=1, le=500),
-    db: Session = Depends(get_db)
-):
-    """Find nearest chargers with optimized routing and filters."""
-    chargers = db.query(Charger).all()
+    })
+    cache_set(cache_key, body)
+    return etag_response(body, etag)
+
+def find_nearby_chargers(db: Session, lat: float, lon: float, connector_type: str | None,
+                         status: str | None, min_rating: float | None,
+                         limit: int, radius_km: float) -> tuple[int, list]:
+    """Nearest chargers by straight-line distance, with the number within the radius."""
+    query = db.query(*CHARGER_COLUMNS)
     
-    # Filter by connector type
+    # Filter by connector type (ignoring case, spaces and dashes)
     if connector_type:
-        ct = connector_type.lower().replace(" ", "").replace("-", "")
-        chargers = [
-            c for c in chargers
-            if c.connector_type and ct in c.connector_type.lower().replace(" ", "").replace("-", "")
-        ]
+        query = query.filter(connector_matches(connector_type))
     
     # Filter by status
     if status:
-        chargers = [c for c in chargers if c.status == status]
-    
-    if not chargers:
-        raise HTTPException(status_code=404, detail="No chargers found matching criteria")
-
-    # Calculate distances
-    chargers_with_distance = []
-    for charger in chargers:
-        straight_distance = haversine_distance(lat, lon, charger.latitude, charger.longitude)
-        if straight_distance <= radius_km:
-            chargers_with_distance.append({
-                "charger": charger,
-                "straight_distance_km": straight_distance
-            })
-    
-    if not chargers_with_distance:
-        raise HTTPException(status_code=404, detail="No chargers found within radius")
-    
-    chargers_with_distance.sort(key=lambda x: x["straight_distance_km"])
+        query = query.filter(Charger.status == status)
     
-    # Use haversine distance for all results (instant, no API calls)
-    # This avoids timeout issues with OpenRouteService API
-    result_chargers = []
+    if min_rating:
+        query = query.filter(Charger.avg_rating >= min_rating)
     
-    for item in chargers_with_distance[:limit]:
-        charger = item["charger"]
-        straight_dist = item["straight_distance_km"]
+    if db.get_bind().dialect.name == "postgresql":
+        # Filter and order by distance in the database so only `limit` rows are fetched;
+        # the bounding box lets the location index prune rows before haversine runs
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        distance = haversine_sql(lat, lon)
+        within_radius = query.filter(
+            Charger.latitude.between(min_lat, max_lat),
+            Charger.longitude.between(min_lon, max_lon),
+            distance <= radius_km
+        )
+        total_within_radius = within_radius.count()
         
-        # Get rating
-        avg_rating = db.query(func.avg(Review.rating)).filter(
-            Review.charger_id == charger.id
-        ).scalar()
+        if total_within_radius == 0:
+            if not db.query(query.exists()).scalar():
+                raise HTTPException(status_code=404, detail="No chargers found matching criteria")
+            raise HTTPException(status_code=404, detail="No chargers found within radius")
         
-        # Filter by min_rating if specified
-        if min_rating and (avg_rating is None or avg_rating < min_rating):
-            continue
+        rows = within_radius.add_columns(distance.label("distance_km")).order_by(distance).limit(limit).all()
+        nearest = [(row, row.distance_km) for row in rows]
+    else:
+        # Distances come from the cached coordinate arrays; the database only
+        # applies the filters to chargers already known to be in range
+        coords = get_charger_coords(db)
+        in_radius, distances = points_within_radius(coords.index, lat, lon, coords.lats, coords.lons, radius_km)
+        distance_by_id = dict(zip(coords.ids[in_radius].tolist(), distances.tolist()))
         
-        review_count = db.query(Review).filter(Review.charger_id == charger.id).count()
+        in_radius_ids = query.with_entities(Charger.id).filter(Charger.id.in_(list(distance_by_id))).all() if distance_by_id else []
+        ids = [row.id for row in in_radius_ids]
+        total_within_radius = len(ids)
+        if total_within_radius == 0:
+            if not db.query(query.exists()).scalar():
+                raise HTTPException(status_code=404, detail="No chargers found matching criteria")
+            raise HTTPException(status_code=404, detail="No chargers found within radius")
+        
+        # Partial sort: only the `limit` nearest need ordering, and only they are fetched in full
+        candidate_distances = np.fromiter((distance_by_id[i] for i in ids), dtype=np.float64, count=len(ids))
+        idx = np.arange(len(ids))
+        if idx.size > limit:
+            idx = np.argpartition(candidate_distances, limit)[:limit]
+        idx = idx[np.argsort(candidate_distances[idx])]
+        rows_by_id = {row.id: row for row in query.filter(Charger.id.in_([ids[i] for i in idx]))}
+        nearest = [(rows_by_id[ids[i]], candidate_distances[i]) for i in idx]
+    
+    # Use haversine distance for all results (instant, no API calls);
+    # driving routes are only requested for the first `max_api_calls` results
+    result_chargers = []
+    
+    for charger, distance_km in nearest:
+        straight_dist = round(float(distance_km), 2)
         
         # Use haversine distance (instant calculation, no API timeout)
         result_chargers.append({
@@ -347,19 +589,65 @@ def get_nearby_chargers(
             "connector_type": charger.connector_type,
             "status": charger.status,
             "distance_km": straight_dist,
-            "duration_minutes": round((straight_dist / 50) * 60, 1),
+            "duration_minutes": round(straight_dist * MINUTES_PER_KM, 1),
             "distance_type": "straight_line",
-            "avg_rating": round(avg_rating, 2) if avg_rating else None,
-            "review_count": review_count
+            "avg_rating": round(charger.avg_rating, 2) if charger.avg_rating else None,
+            "review_count": charger.review_count
         })
     
-    return {
+    return total_within_radius, result_chargers
+
+@app.get("/chargers/nearby", tags=["Chargers"])
+@limiter.limit("30/minute")
+async def get_nearby_chargers(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    connector_type: str | None = Query(None),
+    status: schemas.ChargerStatus | None = Query(None),
+    min_rating: float | None = Query(None, ge=0, le=5),
+    limit: int = Query(10, ge=1, le=27),
+    radius_km: float = Query(100, ge=1, le=500),
+    max_api_calls: int = Query(0, ge=0, le=10, description="Number of nearest results to route by road"),
+    db: Session = Depends(get_db)
+):
+    """Find nearest chargers with optimized routing and filters."""
+    generation = await anyio.to_thread.run_sync(charger_generation)
+    cache_key = charger_cache_key(
+        generation, f"nearby:{lat}:{lon}:{connector_type}:{status}:{min_rating}:{limit}:{radius_km}:{max_api_calls}"
+    )
+    cached = await anyio.to_thread.run_sync(cache_get, cache_key)
+    if cached is not None:
+        return Response(cached, media_type="application/json")
+    
+    # The database lookup runs on a worker thread; road routes are awaited on the event loop
+    total_within_radius, result_chargers = await anyio.to_thread.run_sync(
+        find_nearby_chargers, db, lat, lon, connector_type, status, min_rating, limit, radius_km
+    )
+    
+    if max_api_calls and result_chargers:
+        to_route = result_chargers[:max_api_calls]
+        # One matrix request covers every routed charger
+        routes = await calculate_driving_matrix(
+            lat, lon, [(c["latitude"], c["longitude"]) for c in to_route]
+        )
+        for charger, route in zip(to_route, routes):
+            if route:
+                charger.update(route, distance_type="driving")
+        # Only reorder the routed prefix, and only when every distance in it is a driving one;
+        # the rest stays in straight-line order so the two kinds of distance are never compared
+        if all(routes):
+            result_chargers[:len(to_route)] = sorted(to_route, key=lambda c: c["distance_km"])
+    
+    response = ORJSONResponse({
         "user_location": {"latitude": lat, "longitude": lon},
         "search_radius_km": radius_km,
-        "total_within_radius": len(chargers_with_distance),
+        "total_within_radius": total_within_radius,
         "returned_with_routes": len(result_chargers),
         "nearest_chargers": result_chargers
-    }
+    })
+    await anyio.to_thread.run_sync(cache_set, cache_key, response.body)
+    return response
 
 @app.get("/chargers/{charger_id}", response_model=schemas.ChargerResponse, tags=["Chargers"])
 def get_charger_by_id(charger_id: int, db: Session = Depends(get_db)):
@@ -368,12 +656,6 @@ def get_charger_by_id(charger_id: int, db: Session = Depends(get_db)):
     if not charger:
         raise HTTPException(status_code=404, detail="Charger not found")
     
-    avg_rating = db.query(func.avg(Review.rating)).filter(
-        Review.charger_id == charger.id
-    ).scalar()
-    review_count = db.query(Review).filter(Review.charger_id == charger.id).count()
-    report_count = db.query(ChargerReport).filter(ChargerReport.charger_id == charger.id).count()
-    
     return {
         "id": charger.id,
         "name": charger.name,
@@ -383,21 +665,25 @@ def get_charger_by_id(charger_id: int, db: Session = Depends(get_db)):
         "usage_type": charger.usage_type,
         "connector_type": charger.connector_type,
         "status": charger.status,
-        "avg_rating": round(avg_rating, 2) if avg_rating else None,
-        "review_count": review_count,
-        "report_count": report_count
+        "avg_rating": round(charger.avg_rating, 2) if charger.avg_rating else None,
+        "review_count": charger.review_count,
+        "report_count": charger.report_count
     }
 
 # ============= AUTH ENDPOINTS =============
 @app.post("/auth/register", response_model=dict, tags=["Authentication"])
 @limiter.limit("5/minute")
-def register(
+async def register(
     request: Request,
     user_data: schemas.UserRegister,
     db: Session = Depends(get_db)
 ):
     """Register a new user with password validation."""
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    # Database calls run on worker threads and hashing on the hash limiter,
+    # so neither blocks the event loop
+    existing_user = await anyio.to_thread.run_sync(
+        lambda: db.query(User).filter(User.email == user_data.email).first()
+    )
     
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
@@ -410,32 +696,40 @@ def register(
 
     user = User(
         email=user_data.email,
-        hashed_password=hash_password(user_data.password)
+        hashed_password=await ahash_password(user_data.password)
     )
 
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    await anyio.to_thread.run_sync(add_and_commit, db, user)
 
     return {"message": "Account created successfully", "user_id": user.id}
 
 @app.post("/auth/login", response_model=schemas.TokenResponse, tags=["Authentication"])
 @limiter.limit("10/minute")
-def login(
+async def login(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """Login and receive JWT token."""
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await anyio.to_thread.run_sync(
+        lambda: db.query(User).filter(User.email == form_data.username).first()
+    )
+    # Unknown emails still pay for one verify so response times don't reveal registered accounts
+    stored = user.hashed_password if user else DUMMY_HASH
+    verified, new_hash = await averify_and_update_password(form_data.password, stored)
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
             headers={"WWW-Authenticate": "Bearer"}
         )
 
+    # Legacy bcrypt hashes are replaced with argon2 on the first successful login
+    if new_hash:
+        user.hashed_password = new_hash
+        await anyio.to_thread.run_sync(db.commit)
+
     token = create_access_token(data={"user_id": user.id, "role": user.role})
 
     return {"access_token": token, "token_type": "bearer"}
@@ -456,14 +750,13 @@ def add_review(
     db: Session = Depends(get_db)
 ):
     """Add a review to a charger."""
-    charger = db.query(Charger).filter(Charger.id == charger_id).first()
-    if not charger:
+    if not charger_exists(db, charger_id):
         raise HTTPException(status_code=404, detail="Charger not found")
     
-    existing_review = db.query(Review).filter(
+    existing_review = db.query(exists().where(
         Review.user_id == user.id,
         Review.charger_id == charger_id
-    ).first()
+    )).scalar()
     
     if existing_review:
         raise HTTPException(status_code=400, detail="You already reviewed this charger")
@@ -476,19 +769,23 @@ def add_review(
     )
 
     db.add(review)
+    db.flush()
+    refresh_review_stats(db, charger_id)
     db.commit()
-    db.refresh(review)
+    invalidate_charger_cache()
 
     return {"message": "Review added successfully", "review_id": review.id}
 
 @app.get("/chargers/{charger_id}/reviews", response_model=List[schemas.ReviewResponse], tags=["Reviews"])
 def get_reviews(charger_id: int, db: Session = Depends(get_db)):
     """Get all reviews for a charger."""
-    charger = db.query(Charger).filter(Charger.id == charger_id).first()
-    if not charger:
+    if not charger_exists(db, charger_id):
         raise HTTPException(status_code=404, detail="Charger not found")
     
-    return db.query(Review).filter(Review.charger_id == charger_id).order_by(Review.created_at.desc()).all()
+    # Responses use only columns; raiseload turns an accidental per-row lazy load into an error
+    return db.query(Review).options(raiseload("*")).filter(
+        Review.charger_id == charger_id
+    ).order_by(Review.created_at.desc()).all()
 
 @app.put("/reviews/{review_id}", response_model=dict, tags=["Reviews"])
 @limiter.limit("10/hour")
@@ -509,8 +806,10 @@ def update_review(
     
     review.rating = review_data.rating
     review.comment = review_data.comment
+    db.flush()
+    refresh_review_stats(db, review.charger_id)
     db.commit()
-    db.refresh(review)
+    invalidate_charger_cache()
     
     return {"message": "Review updated successfully", "review_id": review.id}
 
@@ -531,7 +830,10 @@ def delete_review(
         raise HTTPException(status_code=403, detail="You can only delete your own reviews")
     
     db.delete(review)
+    db.flush()
+    refresh_review_stats(db, review.charger_id)
     db.commit()
+    invalidate_charger_cache()
     
     return {"message": "Review deleted successfully"}
 
@@ -544,16 +846,19 @@ def mark_review_helpful(
     db: Session = Depends(get_db)
 ):
     """Mark a review as helpful (one vote per user per review)."""
-    review = db.query(Review).filter(Review.id == review_id).first()
-    if not review:
-        raise HTTPException(status_code=404, detail="Review not found")
-    
     # In production, track votes in a separate table to prevent duplicates
-    # For now, we'll just increment
-    review.helpful_count += 1
+    # For now, we'll just increment (atomically, in one statement)
+    helpful_count = db.execute(
+        update(Review)
+        .where(Review.id == review_id)
+        .values(helpful_count=Review.helpful_count + 1)
+        .returning(Review.helpful_count)
+    ).scalar()
+    if helpful_count is None:
+        raise HTTPException(status_code=404, detail="Review not found")
     db.commit()
     
-    return {"message": "Review marked as helpful", "helpful_count": review.helpful_count}
+    return {"message": "Review marked as helpful", "helpful_count": helpful_count}
 
 # ============= VEHICLE ENDPOINTS =============
 @app.post("/users/me/vehicle", response_model=dict, tags=["Vehicle"])
@@ -577,7 +882,6 @@ def add_or_update_vehicle(
         db.add(vehicle)
 
     db.commit()
-    db.refresh(vehicle)
     return {"message": "Vehicle saved successfully", "vehicle_id": vehicle.id}
 
 @app.get("/users/me/vehicle", response_model=schemas.VehicleResponse | None, tags=["Vehicle"])
@@ -594,22 +898,18 @@ def add_favorite(
     db: Session = Depends(get_db)
 ):
     """Add a charger to favorites."""
-    charger = db.query(Charger).filter(Charger.id == charger_id).first()
-    if not charger:
+    if not charger_exists(db, charger_id):
         raise HTTPException(status_code=404, detail="Charger not found")
 
-    existing = db.query(Favorite).filter(
-        Favorite.user_id == user.id,
-        Favorite.charger_id == charger_id
-    ).first()
+    # The unique (user_id, charger_id) index turns a duplicate into a no-op
+    result = db.execute(
+        insert_ignoring_conflicts(db, Favorite).values(user_id=user.id, charger_id=charger_id)
+    )
+    db.commit()
 
-    if existing:
+    if result.rowcount == 0:
         return {"message": "Charger already in favorites"}
 
-    favorite = Favorite(user_id=user.id, charger_id=charger_id)
-    db.add(favorite)
-    db.commit()
-
     return {"message": "Charger added to favorites"}
 
 @app.delete("/favorites/{charger_id}", tags=["Favorites"])
@@ -619,15 +919,14 @@ def remove_favorite(
     db: Session = Depends(get_db)
 ):
     """Remove a charger from favorites."""
-    favorite = db.query(Favorite).filter(
+    deleted = db.query(Favorite).filter(
         Favorite.user_id == user.id,
         Favorite.charger_id == charger_id
-    ).first()
+    ).delete(synchronize_session=False)
 
-    if not favorite:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Favorite not found")
 
-    db.delete(favorite)
     db.commit()
 
     return {"message": "Charger removed from favorites"}
@@ -638,39 +937,26 @@ def get_my_favorites(user: User = Depends(member_required), db: Session = Depend
     try:
         logger.info(f"Getting favorites for user {user.id}")
         
-        favorites = db.query(Favorite).filter(Favorite.user_id == user.id).all()
-        logger.info(f"Found {len(favorites)} favorites")
-        
-        if not favorites:
-            return []
-        
-        charger_ids = [f.charger_id for f in favorites]
-        chargers = db.query(Charger).filter(Charger.id.in_(charger_ids)).all()
-        logger.info(f"Found {len(chargers)} chargers")
+        chargers = db.query(*CHARGER_COLUMNS).join(
+            Favorite, Favorite.charger_id == Charger.id
+        ).filter(Favorite.user_id == user.id).all()
+        logger.info(f"Found {len(chargers)} favorite chargers")
         
         result = []
         for charger in chargers:
-            try:
-                avg_rating = db.query(func.avg(Review.rating)).filter(Review.charger_id == charger.id).scalar()
-                review_count = db.query(Review).filter(Review.charger_id == charger.id).count()
-                report_count = db.query(ChargerReport).filter(ChargerReport.charger_id == charger.id).count()
-                
-                result.append({
-                    "id": charger.id,
-                    "name": charger.name,
-                    "city": charger.city,
-                    "latitude": charger.latitude,
-                    "longitude": charger.longitude,
-                    "usage_type": charger.usage_type,
-                    "connector_type": charger.connector_type,
-                    "status": charger.status or "unknown",
-                    "avg_rating": round(avg_rating, 2) if avg_rating else None,
-                    "review_count": review_count,
-                    "report_count": report_count
-                })
-            except Exception as e:
-                logger.error(f"Error processing charger {charger.id}: {e}")
-                continue
+            result.append({
+                "id": charger.id,
+                "name": charger.name,
+                "city": charger.city,
+                "latitude": charger.latitude,
+                "longitude": charger.longitude,
+                "usage_type": charger.usage_type,
+                "connector_type": charger.connector_type,
+                "status": charger.status or "unknown",
+                "avg_rating": round(charger.avg_rating, 2) if charger.avg_rating else None,
+                "review_count": charger.review_count,
+                "report_count": charger.report_count
+            })
         
         logger.info(f"Returning {len(result)} chargers")
         return result
@@ -686,39 +972,17 @@ def check_favorite(
     db: Session = Depends(get_db)
 ):
     """Check if a charger is in user's favorites."""
-    exists = db.query(Favorite).filter(
+    is_favorite = db.query(exists().where(
         Favorite.user_id == user.id,
         Favorite.charger_id == charger_id
-    ).first()
+    )).scalar()
 
-    return {"charger_id": charger_id, "is_favorite": exists is not None}
+    return {"charger_id": charger_id, "is_favorite": is_favorite}
 
 # ============= TRIP ENDPOINTS =============
-@app.post("/trips/plan", response_model=schemas.TripResponse, tags=["Trips"])
-@limiter.limit("20/hour")
-def plan_trip(
-    request: Request,
-    trip_data: schemas.TripCreate,
-    user: User = Depends(member_required),
-    db: Session = Depends(get_db)
-):
-    """Plan a trip with charging stops based on vehicle range."""
-    vehicle = db.query(Vehicle).filter(Vehicle.user_id == user.id).first()
-
-    if not vehicle or not vehicle.range_km or not vehicle.connector_type:
-        raise HTTPException(
-            status_code=400,
-            detail="Vehicle with range and connector type required"
-        )
-
-    driving = calculate_driving_distance(
-        trip_data.start_lat, trip_data.start_lon,
-        trip_data.end_lat, trip_data.end_lon
-    )
-
-    if not driving:
-        raise HTTPException(status_code=400, detail="Route calculation failed")
-
+def save_trip_plan(db: Session, user_id: int, vehicle: Vehicle,
+                   trip_data: schemas.TripCreate, driving: dict) -> Trip:
+    """Pick charging stops along the route and store the planned trip."""
     total_distance = driving["distance_km"]
     duration = driving["duration_minutes"]
     waypoints = []
@@ -726,66 +990,46 @@ def plan_trip(
     # Calculate if charging stops are needed
     if total_distance > vehicle.range_km:
         # Find chargers along the route
-        # Get all chargers with matching connector type
-        chargers = db.query(Charger).all()
+        # Prefer working chargers; fall back to any usable (not broken) one only when no
+        # compatible charger anywhere is working, matching the original whole-table choice
+        compatible = connector_matches(vehicle.connector_type)
+        any_working = db.query(exists().where(compatible, Charger.status == "working")).scalar()
+        status_filter = Charger.status == "working" if any_working else Charger.status.is_distinct_from("broken")
+        # A stop within the 50% detour limit is at most (1.5 * total + straight) / 2 from
+        # either end, so only chargers inside both endpoints' boxes are read
+        straight = float(haversine_many(
+            trip_data.start_lat, trip_data.start_lon,
+            np.array([trip_data.end_lat]), np.array([trip_data.end_lon])
+        )[0])
+        reach = (total_distance * 1.5 + straight) / 2
+        start_box = bounding_box(trip_data.start_lat, trip_data.start_lon, reach)
+        end_box = bounding_box(trip_data.end_lat, trip_data.end_lon, reach)
+        working_chargers = db.query(*CHARGER_COLUMNS).filter(
+            compatible,
+            status_filter,
+            Charger.latitude.between(max(start_box[0], end_box[0]), min(start_box[1], end_box[1])),
+            Charger.longitude.between(max(start_box[2], end_box[2]), min(start_box[3], end_box[3]))
+        ).execution_options(stream_results=True).yield_per(500)
+        working_chargers = list(working_chargers)
         
-        # Filter by connector type
-        if vehicle.connector_type:
-            ct = vehicle.connector_type.lower().replace(" ", "").replace("-", "")
-            chargers = [
-                c for c in chargers
-                if c.connector_type and ct in c.connector_type.lower().replace(" ", "").replace("-", "")
-            ]
+        # Find chargers along the route (within reasonable distance from straight line).
+        # Distances to both ends are computed once for all chargers
+        lats = np.fromiter((c.latitude for c in working_chargers), dtype=np.float64, count=len(working_chargers))
+        lons = np.fromiter((c.longitude for c in working_chargers), dtype=np.float64, count=len(working_chargers))
+        from_start = haversine_many(trip_data.start_lat, trip_data.start_lon, lats, lons)
+        to_end = haversine_many(trip_data.end_lat, trip_data.end_lon, lats, lons)
+        via_charger = from_start + to_end
         
-        # Filter by status (prefer working chargers)
-        working_chargers = [c for c in chargers if c.status == "working"]
-        if not working_chargers:
-            working_chargers = [c for c in chargers if c.status != "broken"]
+        # Roughly along the route: max 30% detour, or 50% if nothing qualifies
+        along = np.flatnonzero(via_charger <= total_distance * 1.3)
+        if along.size == 0:
+            along = np.flatnonzero(via_charger <= total_distance * 1.5)
         
-        # Find chargers along the route (within reasonable distance from straight line)
-        route_chargers = []
-        for charger in working_chargers:
-            # Calculate distance from start
-            dist_from_start = haversine_distance(
-                trip_data.start_lat, trip_data.start_lon,
-                charger.latitude, charger.longitude
-            )
-            
-            # Calculate distance to end
-            dist_to_end = haversine_distance(
-                charger.latitude, charger.longitude,
-                trip_data.end_lat, trip_data.end_lon
-            )
-            
-            # Check if charger is roughly along the route (within 30% detour - increased tolerance)
-            total_via_charger = dist_from_start + dist_to_end
-            if total_via_charger <= total_distance * 1.3:  # Max 30% detour (increased from 20%)
-                route_chargers.append({
-                    "charger": charger,
-                    "distance_from_start": dist_from_start,
-                    "distance_to_end": dist_to_end
-                })
-        
-        # If no chargers found with 30% detour, try 50% detour
-        if not route_chargers:
-            for charger in working_chargers:
-                dist_from_start = haversine_distance(
-                    trip_data.start_lat, trip_data.start_lon,
-                    charger.latitude, charger.longitude
-                )
-                
-                dist_to_end = haversine_distance(
-                    charger.latitude, charger.longitude,
-                    trip_data.end_lat, trip_data.end_lon
-                )
-                
-                total_via_charger = dist_from_start + dist_to_end
-                if total_via_charger <= total_distance * 1.5:  # Max 50% detour
-                    route_chargers.append({
-                        "charger": charger,
-                        "distance_from_start": dist_from_start,
-                        "distance_to_end": dist_to_end
-                    })
+        route_chargers = [{
+            "charger": working_chargers[i],
+            "distance_from_start": float(from_start[i]),
+            "distance_to_end": float(to_end[i])
+        } for i in along]
         
         # Sort by distance from start
         route_chargers.sort(key=lambda x: x["distance_from_start"])
@@ -832,26 +1076,61 @@ def plan_trip(
         waypoints = waypoints[:5]
 
     trip = Trip(
-        user_id=user.id,
+        user_id=user_id,
         start_lat=trip_data.start_lat,
         start_lon=trip_data.start_lon,
         end_lat=trip_data.end_lat,
         end_lon=trip_data.end_lon,
-        waypoints=json.dumps(waypoints),
+        waypoints=waypoints,
         total_distance_km=total_distance,
         estimated_duration_minutes=duration
     )
 
     db.add(trip)
     db.commit()
-    db.refresh(trip)
 
     return trip
 
+@app.post("/trips/plan", response_model=schemas.TripResponse, tags=["Trips"])
+@limiter.limit("20/hour")
+async def plan_trip(
+    request: Request,
+    trip_data: schemas.TripCreate,
+    user: User = Depends(member_required),
+    db: Session = Depends(get_db)
+):
+    """Plan a trip with charging stops based on vehicle range."""
+    # Database and stop-selection work runs on worker threads; the route request is
+    # awaited on the event loop instead of holding a thread for the whole round trip.
+    # The vehicle lookup and the route don't depend on each other, so they run concurrently
+    # (only the worker thread touches the session, so it is never shared between threads)
+    vehicle, driving = await asyncio.gather(
+        anyio.to_thread.run_sync(
+            lambda: db.query(Vehicle).filter(Vehicle.user_id == user.id).first()
+        ),
+        calculate_driving_distance(
+            trip_data.start_lat, trip_data.start_lon,
+            trip_data.end_lat, trip_data.end_lon
+        )
+    )
+
+    if not vehicle or not vehicle.range_km or not vehicle.connector_type:
+        raise HTTPException(
+            status_code=400,
+            detail="Vehicle with range and connector type required"
+        )
+
+    if not driving:
+        raise HTTPException(status_code=400, detail="Route calculation failed")
+
+    return await anyio.to_thread.run_sync(save_trip_plan, db, user.id, vehicle, trip_data, driving)
+
 @app.get("/trips", response_model=List[schemas.TripResponse], tags=["Trips"])
 def get_my_trips(user: User = Depends(member_required), db: Session = Depends(get_db)):
     """Get user's trip history."""
-    return db.query(Trip).filter(Trip.user_id == user.id).order_by(Trip.created_at.desc()).all()
+    return db.query(Trip).options(raiseload("*")).filter(
+        Trip.user_id == user.id
+    ).order_by(Trip.created_at.desc()).all()
 
 @app.delete("/trips/{trip_id}", tags=["Trips"])
 def delete_trip(
@@ -860,12 +1139,11 @@ def delete_trip(
     db: Session = Depends(get_db)
 ):
     """Delete a trip."""
-    trip = db.query(Trip).filter(Trip.id == trip_id, Trip.user_id == user.id).first()
+    deleted = db.query(Trip).filter(Trip.id == trip_id, Trip.user_id == user.id).delete(synchronize_session=False)
 
-    if not trip:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Trip not found")
 
-    db.delete(trip)
     db.commit()
 
     return {"message": "Trip deleted"}
@@ -877,12 +1155,12 @@ def report_charger_issue(
     request: Request,
     charger_id: int,
     report_data: schemas.ChargerReportCreate,
+    background_tasks: BackgroundTasks,
     user: User = Depends(member_required),
     db: Session = Depends(get_db)
 ):
     """Report charger status (broken/working) - community-driven."""
-    charger = db.query(Charger).filter(Charger.id == charger_id).first()
-    if not charger:
+    if not charger_exists(db, charger_id):
         raise HTTPException(status_code=404, detail="Charger not found")
     
     report = ChargerReport(
@@ -894,22 +1172,24 @@ def report_charger_issue(
     )
     
     db.add(report)
+    db.query(Charger).filter(Charger.id == charger_id).update(
+        {"report_count": Charger.report_count + 1}, synchronize_session=False
+    )
     db.commit()
-    db.refresh(report)
+    invalidate_charger_cache()
     
-    # Update charger status based on reports
-    update_charger_status(charger_id, db)
+    # Update charger status based on reports once the response is sent
+    schedule_status_update(background_tasks, charger_id)
     
     return {"message": "Report submitted successfully", "report_id": report.id}
 
 @app.get("/chargers/{charger_id}/reports", tags=["Reports"])
 def get_charger_reports(charger_id: int, db: Session = Depends(get_db)):
     """Get reports for a specific charger."""
-    charger = db.query(Charger).filter(Charger.id == charger_id).first()
-    if not charger:
+    if not charger_exists(db, charger_id):
         raise HTTPException(status_code=404, detail="Charger not found")
     
-    reports = db.query(ChargerReport).filter(
+    reports = db.query(ChargerReport).options(raiseload("*")).filter(
         ChargerReport.charger_id == charger_id
     ).order_by(ChargerReport.created_at.desc()).all()
     
@@ -922,26 +1202,16 @@ def get_charger_status(charger_id: int, db: Session = Depends(get_db)):
     if not charger:
         raise HTTPException(status_code=404, detail="Charger not found")
     
-    # Get reports from last 7 days
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    recent_reports = db.query(ChargerReport).filter(
-        and_(
-            ChargerReport.charger_id == charger_id,
-            ChargerReport.created_at >= seven_days_ago
-        )
-    ).all()
-    
-    broken_count = sum(1 for r in recent_reports if r.issue_type == "broken")
-    working_count = sum(1 for r in recent_reports if r.issue_type == "working")
+    report_counts = recent_report_counts(charger_id, db)
     
     return {
         "charger_id": charger_id,
         "current_status": charger.status,
         "status_updated_at": charger.status_updated_at,
         "recent_reports_7days": {
-            "broken": broken_count,
-            "working": working_count,
-            "total": len(recent_reports)
+            "broken": report_counts.get("broken", 0),
+            "working": report_counts.get("working", 0),
+            "total": sum(report_counts.values())
         }
     }
 
@@ -949,14 +1219,19 @@ def get_charger_status(charger_id: int, db: Session = Depends(get_db)):
 @app.get("/users/me/stats", tags=["Users"])
 def get_user_stats(user: User = Depends(member_required), db: Session = Depends(get_db)):
     """Get user statistics."""
-    total_trips = db.query(Trip).filter(Trip.user_id == user.id).count()
-    total_reviews = db.query(Review).filter(Review.user_id == user.id).count()
-    total_favorites = db.query(Favorite).filter(Favorite.user_id == user.id).count()
-    total_reports = db.query(ChargerReport).filter(ChargerReport.user_id == user.id).count()
-    
-    total_distance = db.query(func.sum(Trip.total_distance_km)).filter(
-        Trip.user_id == user.id
-    ).scalar() or 0
+    # Every figure comes back in one round-trip as scalar subqueries of a single SELECT
+    stats = db.execute(select(
+        select(func.count(Trip.id)).where(Trip.user_id == user.id).scalar_subquery().label("trips"),
+        select(func.count(Review.id)).where(Review.user_id == user.id).scalar_subquery().label("reviews"),
+        select(func.count(Favorite.id)).where(Favorite.user_id == user.id).scalar_subquery().label("favorites"),
+        select(func.count(ChargerReport.id)).where(ChargerReport.user_id == user.id).scalar_subquery().label("reports"),
+        select(func.sum(Trip.total_distance_km)).where(
+            Trip.user_id == user.id
+        ).scalar_subquery().label("distance")
+    )).one()
+    total_trips, total_reviews = stats.trips, stats.reviews
+    total_favorites, total_reports = stats.favorites, stats.reports
+    total_distance = stats.distance or 0
     
     return {
         "total_trips": total_trips,
@@ -0,0 +1,99 @@
+import logging
+from sqlalchemy import func, inspect, select, text, update
+from app.database import SessionLocal, Base, engine
+from app.models import Charger, Review, ChargerReport, normalize_connector_type
+
+logger = logging.getLogger(__name__)
+
+# Startup upgrades for databases created by older versions: create_all only creates missing
+# tables, so columns and indexes added since are created here and then backfilled
+
+def add_missing_charger_columns() -> set:
+    """Add charger columns introduced after the table was created; returns their names."""
+    existing = {column["name"] for column in inspect(engine).get_columns("chargers")}
+    missing = [column for column in Charger.__table__.columns if column.name not in existing]
+    with engine.begin() as conn:
+        for column in missing:
+            ddl = f"ALTER TABLE chargers ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+            if column.default is not None and column.default.is_scalar:
+                ddl += f" DEFAULT {column.default.arg!r}"
+            conn.execute(text(ddl))
+    if missing:
+        logger.info(f"Added charger columns: {', '.join(column.name for column in missing)}")
+    return {column.name for column in missing}
+
+# Indexes older versions created that the models no longer declare
+RETIRED_INDEXES = ("ix_chargers_status", "ix_reviews_charger_id", "ix_reviews_user_id")
+
+def create_missing_indexes():
+    """Create indexes declared after their tables were created and drop retired ones."""
+    with engine.begin() as conn:
+        for name in RETIRED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for table in Base.metadata.sorted_tables:
+        existing = {ix["name"]: ix for ix in inspect(engine).get_indexes(table.name)}
+        for index in table.indexes:
+            # Older versions declared the location index unique; rebuild it to match the model
+            if index.name in existing and bool(existing[index.name]["unique"]) != index.unique:
+                index.drop(bind=engine)
+            index.create(bind=engine, checkfirst=True)
+
+def backfill_charger_aggregates():
+    """Recompute every charger's stored rating and report aggregates in one UPDATE."""
+    db = SessionLocal()
+    try:
+        charger_reviews = Review.charger_id == Charger.id
+        db.query(Charger).update({
+            "avg_rating": select(func.avg(Review.rating)).where(charger_reviews).scalar_subquery(),
+            "review_count": select(func.count(Review.id)).where(charger_reviews).scalar_subquery(),
+            "report_count": select(func.count(ChargerReport.id)).where(
+                ChargerReport.charger_id == Charger.id
+            ).scalar_subquery()
+        }, synchronize_session=False)
+        db.commit()
+        logger.info("Backfilled charger rating and report aggregates")
+    except Exception as e:
+        logger.error(f"Charger aggregate backfill failed: {e}")
+    finally:
+        db.close()
+
+def backfill_connector_type_norm():
+    """Fill connector_type_norm for chargers stored before the column existed."""
+    db = SessionLocal()
+    try:
+        rows = db.query(Charger.id, Charger.connector_type).filter(
+            Charger.connector_type_norm.is_(None), Charger.connector_type.isnot(None)
+        ).all()
+        if rows:
+            db.execute(update(Charger), [
+                {"id": r.id, "connector_type_norm": normalize_connector_type(r.connector_type)}
+                for r in rows
+            ])
+            db.commit()
+            logger.info(f"Backfilled connector_type_norm for {len(rows)} chargers")
+    except Exception as e:
+        logger.error(f"connector_type_norm backfill failed: {e}")
+    finally:
+        db.close()
+
+def init_database():
+    """Create tables if they don't exist and fill in derived columns."""
+    try:
+        Base.metadata.create_all(bind=engine)
+        logger.info("Database tables created successfully")
+    except Exception as e:
+        logger.error(f"Database initialization error: {e}")
+        # Continue anyway - tables might already exist
+    # create_all doesn't alter existing tables, so columns added since are created here
+    try:
+        added = add_missing_charger_columns()
+    except Exception as e:
+        logger.error(f"Charger column upgrade failed: {e}")
+        added = set()
+    try:
+        create_missing_indexes()
+    except Exception as e:
+        logger.error(f"Index upgrade failed: {e}")
+    if added & {"avg_rating", "review_count", "report_count"}:
+        backfill_charger_aggregates()
+    backfill_connector_type_norm()
@@ -1,25 +1,95 @@
-from sqlalchemy import ForeignKey, Column, Integer, String, Float, DateTime, Text, Index
+import re
+from sqlalchemy import ForeignKey, Column, Integer, String, Float, DateTime, Text, Index, DDL, JSON, UniqueConstraint, event, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 from app.database import Base
-from datetime import datetime
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
+
+class utcnow(FunctionElement):
+    """Current UTC time, read from the database clock."""
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    # CURRENT_TIMESTAMP only has whole seconds on SQLite
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+def normalize_connector_type(connector_type: str | None) -> str | None:
+    """Lowercase a connector type and strip spaces and dashes ("CCS Type-2" -> "ccstype2")."""
+    if connector_type is None:
+        return None
+    return re.sub(r"[\s-]", "", connector_type.lower())
+
+def _connector_type_norm_default(context):
+    return normalize_connector_type(context.get_current_parameters().get("connector_type"))
+
+PROBLEM_STATUSES = "status = 'broken' OR status = 'occupied' OR status = 'under_construction'"
 
 class Charger(Base):
     __tablename__ = "chargers"
 
     id = Column(Integer, primary_key=True, index=True)
+    # OpenChargeMap POI ID; lets data_fetch.py re-import without duplicating rows
+    external_id = Column(Integer, nullable=True)
     name = Column(String, index=True)
     city = Column(String, index=True)
     latitude = Column(Float)
     longitude = Column(Float)
     usage_type = Column(String, index=True)
     connector_type = Column(String)
-    status = Column(String, default="unknown", index=True)  # unknown, working, broken
-    status_updated_at = Column(DateTime, default=datetime.utcnow)
+    # Normalized copy of connector_type so connector filters run as a plain LIKE in SQL
+    connector_type_norm = Column(String, default=_connector_type_norm_default)
+    status = Column(String, default="unknown")  # unknown, working, broken
+    # Timestamps are rendered into the INSERT as SQL, so the database clock sets them and
+    # older tables need no schema change
+    status_updated_at = Column(DateTime, default=utcnow())
+    
+    # Aggregates kept in sync by the review and report endpoints
+    avg_rating = Column(Float, nullable=True)
+    review_count = Column(Integer, default=0, nullable=False)
+    report_count = Column(Integer, default=0, nullable=False)
     
     # Relationships
     reviews = relationship("Review", back_populates="charger", cascade="all, delete-orphan")
     favorites = relationship("Favorite", back_populates="charger", cascade="all, delete-orphan")
     reports = relationship("ChargerReport", back_populates="charger", cascade="all, delete-orphan")
+    
+    @validates("connector_type")
+    def _sync_connector_type_norm(self, key, value):
+        self.connector_type_norm = normalize_connector_type(value)
+        return value
+    
+    __table_args__ = (
+        Index('ix_chargers_external_id', 'external_id', unique=True),
+        # Distinct chargers can share coordinates, so the location index stays non-unique
+        Index('ix_chargers_location', 'latitude', 'longitude'),
+        # Only the rare problem statuses are selective enough to be worth an index. Written
+        # as ORs so SQLite can match it against a plain status = ? filter
+        Index('ix_chargers_status_problem', 'status',
+              postgresql_where=text(PROBLEM_STATUSES), sqlite_where=text(PROBLEM_STATUSES)),
+        # Trigram indexes let PostgreSQL serve the substring ILIKE searches without a full scan
+        Index('ix_chargers_city_trgm', 'city', postgresql_using='gin',
+              postgresql_ops={'city': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        Index('ix_chargers_usage_type_trgm', 'usage_type', postgresql_using='gin',
+              postgresql_ops={'usage_type': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        Index('ix_chargers_connector_type_norm_trgm', 'connector_type_norm', postgresql_using='gin',
+              postgresql_ops={'connector_type_norm': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+
+event.listen(
+    Charger.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
 
 class User(Base):
     __tablename__ = "users"
@@ -28,7 +98,7 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     role = Column(String, default="member")
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow())
     
     # Relationships
     reviews = relationship("Review", back_populates="user")
@@ -43,7 +113,7 @@ class Review(Base):
     id = Column(Integer, primary_key=True, index=True)
     rating = Column(Integer, nullable=False)
     comment = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow())
     helpful_count = Column(Integer, default=0)
 
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
@@ -54,8 +124,10 @@ class Review(Base):
     charger = relationship("Charger", back_populates="reviews")
     
     __table_args__ = (
-        Index('ix_reviews_charger_id', 'charger_id'),
-        Index('ix_reviews_user_id', 'user_id'),
+        # Serves a charger's reviews newest first and its rating aggregates
+        Index('ix_reviews_charger_created', 'charger_id', 'created_at'),
+        # Serves the one-review-per-charger check, per-user counts and user deletes
+        Index('ix_reviews_user_charger', 'user_id', 'charger_id'),
     )
 
 class Vehicle(Base):
@@ -76,14 +148,16 @@ class Favorite(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     charger_id = Column(Integer, ForeignKey("chargers.id", ondelete="CASCADE"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow())
     
     # Relationships
     user = relationship("User", back_populates="favorites")
     charger = relationship("Charger", back_populates="favorites")
     
     __table_args__ = (
-        Index('ix_favorites_user_charger', 'user_id', 'charger_id', unique=True),
+        # Also serves the per-user favorite lookups, so user_id needs no index of its own
+        UniqueConstraint('user_id', 'charger_id', name='uq_favorites_user_charger'),
+        Index('ix_favorites_charger_id', 'charger_id'),
     )
 
 class Trip(Base):
@@ -97,14 +171,19 @@ class Trip(Base):
     end_lat = Column(Float, nullable=False)
     end_lon = Column(Float, nullable=False)
 
-    waypoints = Column(Text, default="[]")
+    # List of charging stop dicts; JSONB on PostgreSQL, JSON text elsewhere
+    waypoints = Column(JSON().with_variant(JSONB(), "postgresql"), default=list)
     total_distance_km = Column(Float)
     estimated_duration_minutes = Column(Float)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow())
     
     # Relationship
     user = relationship("User", back_populates="trips")
+    
+    __table_args__ = (
+        Index('ix_trips_user_created', 'user_id', 'created_at'),
+    )
 
 class ChargerReport(Base):
     __tablename__ = "charger_reports"
@@ -115,8 +194,14 @@ class ChargerReport(Base):
     issue_type = Column(String, nullable=False)
     description = Column(Text, nullable=False)
     status = Column(String, default="open")
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow())
     
     # Relationships
     charger = relationship("Charger", back_populates="reports")
-    user = relationship("User", back_populates="reports")
\ No newline at end of file
+    user = relationship("User", back_populates="reports")
+    
+    __table_args__ = (
+        # Covers the per-charger counts and the 7-day status window
+        Index('ix_charger_reports_charger_created', 'charger_id', 'created_at'),
+        Index('ix_charger_reports_user_id', 'user_id'),
+    )
\ No newline at end of file
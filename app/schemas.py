@@ -1,5 +1,11 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, StringConstraints
 from datetime import datetime
+from typing import Annotated, Generic, Literal, TypeVar
+
+T = TypeVar("T")
+
+ChargerStatus = Literal["working", "broken", "occupied", "under_construction", "unknown"]
+IssueType = Literal["broken", "working", "occupied", "under_construction"]
 
 # User Schemas
 class UserRegister(BaseModel):
@@ -7,7 +13,8 @@ class UserRegister(BaseModel):
     password: str = Field(..., min_length=8, description="Password must be at least 8 characters")
 
 class UserLogin(BaseModel):
-    email: EmailStr
+    # Only has to match a stored address, so a cheap shape check replaces email-validator
+    email: Annotated[str, StringConstraints(max_length=254, pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$")]
     password: str
 
 class UserResponse(BaseModel):
@@ -15,8 +22,7 @@ class UserResponse(BaseModel):
     email: str
     role: str
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 # Charger Schemas
 class ChargerBase(BaseModel):
@@ -40,8 +46,7 @@ class ChargerResponse(BaseModel):
     review_count: int = 0
     report_count: int = 0
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 class ChargerWithDistance(ChargerResponse):
     distance_km: float
@@ -51,11 +56,11 @@ class ChargerWithDistance(ChargerResponse):
 # Review Schemas
 class ReviewCreate(BaseModel):
     rating: int = Field(..., ge=1, le=5)
-    comment: str | None = Field(None, max_length=500)
+    comment: Annotated[str, StringConstraints(max_length=500)] | None = None
 
 class ReviewUpdate(BaseModel):
     rating: int = Field(..., ge=1, le=5)
-    comment: str | None = Field(None, max_length=500)
+    comment: Annotated[str, StringConstraints(max_length=500)] | None = None
 
 class ReviewResponse(BaseModel):
     id: int
@@ -66,8 +71,7 @@ class ReviewResponse(BaseModel):
     created_at: datetime | None = None
     helpful_count: int = 0
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 # Vehicle Schemas
 class VehicleCreate(BaseModel):
@@ -80,8 +84,7 @@ class VehicleResponse(BaseModel):
     connector_type: str
     range_km: float | None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 # Trip Schemas
 class TripCreate(BaseModel):
@@ -97,25 +100,24 @@ class TripResponse(BaseModel):
     start_lon: float
     end_lat: float
     end_lon: float
-    waypoints: str
+    waypoints: list[dict]
     total_distance_km: float | None
     estimated_duration_minutes: float | None
     created_at: datetime | None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 # Report Schema
 class ChargerReportCreate(BaseModel):
-    issue_type: str = Field(..., pattern="^(broken|working|occupied|under_construction)$")
-    description: str = Field(..., min_length=1, max_length=500)
+    issue_type: IssueType
+    description: Annotated[str, StringConstraints(min_length=1, max_length=500)]
 
 # Pagination Response
-class PaginatedResponse(BaseModel):
+class PaginatedResponse(BaseModel, Generic[T]):
     total: int
     skip: int
     limit: int
-    results: list
+    results: list[T]
 
 class TokenResponse(BaseModel):
     access_token: str
@@ -3,15 +3,60 @@ EV Charging Tunisia - Streamlit Frontend v3.0
 Completely rebuilt with working endpoints and proper error handling
 """
 
+import math
 import streamlit as st
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import folium
+from folium.plugins import FastMarkerCluster
 from streamlit_folium import st_folium
 import pandas as pd
-import json
+import numpy as np
 
 # ============= CONFIG =============
 API_BASE_URL = "http://127.0.0.1:8000"
+HOME_VIEW = {'lat': 36.8, 'lon': 10.1, 'radius_km': 200, 'zoom': 7}  # initial Home map view
+# Marker colour per charger status; anything else (unknown) is gray
+STATUS_COLOR = {
+    'working': 'green',
+    'broken': 'red',
+    'under_construction': 'orange',  # folium doesn't have yellow, orange is closest
+    'occupied': 'beige'  # folium's beige appears orange-ish
+}
+ICON_OPTIONS = {'icon': 'plug', 'prefix': 'fa'}
+POPUP_FIELDS = (
+    '<h4>{name}</h4>'
+    '<p><b>City:</b> {city}</p>'
+    '<p><b>Connector:</b> {connector_type}</p>'
+    '<p><b>Status:</b> {status_label}</p>'
+)
+POPUP_TEMPLATE = '<div style="width: 200px;">' + POPUP_FIELDS + '</div>'
+POPUP_TEMPLATE_WITH_DISTANCE = (
+    '<div style="width: 200px;">' + POPUP_FIELDS + '<p><b>Distance:</b> {distance_km} km</p></div>'
+)
+CLUSTER_THRESHOLD = 50  # above this many chargers, markers are built in the browser
+
+# Builds one canvas circle per [lat, lon, name, city, connector, status, color] row,
+# filled with the awesome-markers shade of the status colour
+CLUSTER_CALLBACK = """
+function (row) {
+    var fills = {green: '#72b026', red: '#d63e2a', orange: '#f69730', beige: '#ffcb92', gray: '#575757'};
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: 7, weight: 1, color: '#333', fillColor: fills[row[6]], fillOpacity: 0.8
+    });
+    marker.bindPopup(
+        '<div style="width: 200px;"><h4>' + row[2] + '</h4>' +
+        '<p><b>City:</b> ' + row[3] + '</p>' +
+        '<p><b>Connector:</b> ' + row[4] + '</p>' +
+        '<p><b>Status:</b> ' + row[5] + '</p></div>',
+        {maxWidth: 250}
+    );
+    marker.bindTooltip(row[2]);
+    return marker;
+}
+"""
 
 st.set_page_config(
     page_title="Volty ⚡",
@@ -28,6 +73,10 @@ if 'search_results' not in st.session_state:
     st.session_state.search_results = None
 if 'filter_results' not in st.session_state:
     st.session_state.filter_results = None
+if 'added_favorites' not in st.session_state:
+    st.session_state.added_favorites = set()
+if 'home_view' not in st.session_state:
+    st.session_state.home_view = dict(HOME_VIEW)
 
 # ============= HELPER FUNCTIONS =============
 def get_headers():
@@ -35,6 +84,22 @@ def get_headers():
         return {"Authorization": f"Bearer {st.session_state.token}"}
     return {}
 
+@st.cache_resource
+def get_session():
+    """Shared HTTP session so API calls reuse pooled keep-alive connections"""
+    session = requests.Session()
+    # The API gzips larger responses (charger lists) when asked
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "Accept": "application/json"})
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        # Retries only idempotent methods; the last response falls through to raise_for_status
+        max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504], raise_on_status=False)
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 def api_call(method, endpoint, **kwargs):
     """Make API call with proper error handling"""
     try:
@@ -42,60 +107,231 @@ def api_call(method, endpoint, **kwargs):
         headers = kwargs.pop('headers', {})
         headers.update(get_headers())
         
-        response = requests.request(method, url, headers=headers, timeout=10, **kwargs)
+        response = get_session().request(method, url, headers=headers, timeout=10, **kwargs)
         response.raise_for_status()
-        return response.json(), None
+        if method != "GET":
+            clear_cached_gets()
+        return orjson.loads(response.content), None
     except requests.exceptions.ConnectionError:
         return None, "Cannot connect to API. Is it running?"
     except requests.exceptions.Timeout:
         return None, "Request timed out"
     except requests.exceptions.HTTPError as e:
         try:
-            error_detail = e.response.json().get('detail', str(e))
+            error_detail = orjson.loads(e.response.content).get('detail', str(e))
         except:
             error_detail = str(e)
         return None, f"API Error: {error_detail}"
     except Exception as e:
         return None, f"Error: {str(e)}"
 
-def create_map(chargers, center_lat=36.8, center_lon=10.1, zoom=7):
-    """Create folium map with charger markers"""
-    m = folium.Map(location=[center_lat, center_lon], zoom_start=zoom)
+class APIError(Exception):
+    """Raised by the cached GET helpers so a failed call is never cached"""
+
+def get_or_raise(endpoint):
+    data, error = api_call("GET", endpoint)
+    if error:
+        raise APIError(error)
+    return data
+
+def from_cache(getter, *args):
+    """Call a cached GET helper, returning (data, error) like api_call"""
+    try:
+        return getter(*args), None
+    except APIError as e:
+        return None, str(e)
+
+# Streamlit reruns the whole script on every interaction; these keep
+# idempotent GETs from hitting the API each time.
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_get_chargers(limit):
+    return get_or_raise(f"/chargers?limit={limit}")
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_charger_labels(limit):
+    """Selectbox labels by charger id, built once per cached charger list"""
+    return {c['id']: f"{c['name']} - {c['city']}" for c in cached_get_chargers(limit)['results']}
+
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_get_nearby(lat, lon, radius_km):
+    return get_or_raise(f"/chargers/nearby?lat={lat}&lon={lon}&radius_km={radius_km}&limit=27")
+
+# The token argument only keys the cache per user; api_call sends the header
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_get_me(token):
+    return get_or_raise("/users/me")
+
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_get_favorites(token):
+    return get_or_raise("/favorites")
+
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_get_vehicle(token):
+    return get_or_raise("/users/me/vehicle")
+
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_get_stats(token):
+    return get_or_raise("/users/me/stats")
+
+def clear_cached_gets():
+    """Drop cached GETs after a write so the next render shows it"""
+    for getter in (cached_get_chargers, cached_charger_labels, cached_get_nearby, cached_get_me,
+                   cached_get_favorites, cached_get_vehicle, cached_get_stats):
+        getter.clear()
+
+def view_from_bounds(bounds, zoom):
+    """Centre and covering radius of Leaflet map bounds, rounded so close views share a cache entry"""
+    sw, ne = bounds['_southWest'], bounds['_northEast']
+    lat = (sw['lat'] + ne['lat']) / 2
+    lon = ((sw['lng'] + ne['lng']) / 2 + 180) % 360 - 180  # Leaflet lets longitude wrap past ±180
+    # Half the diagonal, at ~111 km per degree of latitude
+    half_height = (ne['lat'] - sw['lat']) * 111 / 2
+    half_width = (ne['lng'] - sw['lng']) * 111 * math.cos(math.radians(lat)) / 2
+    radius_km = min(max(round(math.hypot(half_height, half_width)), 1), 500)
+    return {'lat': round(lat, 2), 'lon': round(lon, 2), 'radius_km': radius_km, 'zoom': zoom}
+
+def on_home_map_move():
+    """Move the Home fetch to the visible area once the map is zoomed or panned far enough"""
+    state = st.session_state.get('home_map') or {}
+    bounds, zoom = state.get('bounds'), state.get('zoom')
+    if not bounds or bounds['_southWest']['lat'] is None or zoom is None:
+        return
+    
+    view = st.session_state.home_view
+    new_view = view_from_bounds(bounds, zoom)
+    shift_km = math.hypot(
+        (new_view['lat'] - view['lat']) * 111,
+        (new_view['lon'] - view['lon']) * 111 * math.cos(math.radians(view['lat']))
+    )
+    if new_view['zoom'] != view['zoom'] or shift_km > view['radius_km'] / 4:
+        st.session_state.home_view = new_view
+
+def add_favorite(charger_id, key):
+    """Button callback: runs before the card redraws, so the star is already right"""
+    _, err = api_call("POST", f"/favorites/{charger_id}")
+    if err:
+        st.session_state[f"{key}_message"] = f"Error: {err}"
+    else:
+        st.session_state.added_favorites.add(charger_id)
+        st.session_state[f"{key}_message"] = "✅ Added to favorites!"
+
+def favorite_button(charger_id, fav_ids, key):
+    """Star button for a search result, showing whether it is already a favorite"""
+    if charger_id in fav_ids or charger_id in st.session_state.added_favorites:
+        st.button("⭐ Favorited", key=key, disabled=True, use_container_width=True)
+    else:
+        st.button("☆ Favorite", key=key, use_container_width=True, on_click=add_favorite, args=(charger_id, key))
+    
+    # Callbacks can't draw inside a fragment rerun, so the outcome is shown here
+    message = st.session_state.pop(f"{key}_message", None)
+    if message:
+        st.toast(message)
+
+# Result cards are fragments: a favorite click reruns only its own card,
+# not the whole search page
+@st.fragment
+def nearby_result_card(charger, fav_ids):
+    """Expander for one nearby-search result"""
+    with st.expander(f"{charger['name']} - {charger['distance_km']} km"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write(f"**City:** {charger['city']}")
+            st.write(f"**Connector:** {charger['connector_type']}")
+            st.write(f"**Status:** {charger.get('status', 'unknown').title()}")
+        with col2:
+            st.write(f"**Distance:** {charger['distance_km']} km")
+            st.write(f"**Duration:** ~{charger['duration_minutes']} min")
+            if charger.get('avg_rating'):
+                st.write(f"**Rating:** ⭐ {charger['avg_rating']}")
+        
+        # Add to favorites button with clear feedback
+        if st.session_state.token:
+            col_btn1, col_btn2 = st.columns([1, 3])
+            with col_btn1:
+                favorite_button(charger['id'], fav_ids, key=f"fav_{charger['id']}")
+        else:
+            st.info("💡 Login to add favorites")
+
+@st.fragment
+def filter_result_card(charger, fav_ids):
+    """Expander for one filter-search result"""
+    with st.expander(f"{charger['name']} - {charger['city']}"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write(f"**Connector:** {charger['connector_type']}")
+            st.write(f"**Usage:** {charger['usage_type']}")
+        with col2:
+            st.write(f"**Status:** {charger.get('status', 'unknown').replace('_', ' ').title()}")
+            if charger.get('avg_rating'):
+                st.write(f"**Rating:** ⭐ {charger['avg_rating']}")
+        
+        # Add to favorites button
+        if st.session_state.token:
+            col_btn1, col_btn2 = st.columns([1, 3])
+            with col_btn1:
+                favorite_button(charger['id'], fav_ids, key=f"fav_filter_{charger['id']}")
+        else:
+            st.info("💡 Login to add favorites")
+
+# Reruns with the same chargers and view reuse the built map instead of
+# recreating every marker; it's never mutated after it's returned
+@st.cache_resource(ttl=300, max_entries=32, show_spinner=False)
+def create_map(chargers, center_lat=36.8, center_lon=10.1, zoom=7, with_distance=False):
+    """Create folium map with charger markers; with_distance adds each charger's distance_km to its popup.
+    A center_lat of None fits the view to the chargers instead."""
+    popup_template = POPUP_TEMPLATE_WITH_DISTANCE if with_distance else POPUP_TEMPLATE
+    bounds = None
+    if center_lat is None and chargers:
+        lats = np.fromiter((c['latitude'] for c in chargers), dtype=float, count=len(chargers))
+        lons = np.fromiter((c['longitude'] for c in chargers), dtype=float, count=len(chargers))
+        center_lat, center_lon = lats.mean(), lons.mean()
+        bounds = [[lats.min(), lons.min()], [lats.max(), lons.max()]]
+    elif center_lat is None:
+        center_lat, center_lon = HOME_VIEW['lat'], HOME_VIEW['lon']
+    
+    m = folium.Map(location=[center_lat, center_lon], zoom_start=zoom, prefer_canvas=True)
+    if bounds:
+        m.fit_bounds(bounds, max_zoom=14)  # a single charger shouldn't zoom to street level
+    # Large sets ship as a compact array instead of one Python-built Marker each
+    cluster_rows = [] if len(chargers) > CLUSTER_THRESHOLD else None
     
     for charger in chargers:
         status = charger.get('status', 'unknown')
         
-        # Map status to colors: green=working, red=broken, yellow=under_construction, orange=occupied, gray=unknown
-        if status == 'working':
-            color = 'green'
-        elif status == 'broken':
-            color = 'red'
-        elif status == 'under_construction':
-            color = 'orange'  # folium doesn't have yellow, orange is closest
-        elif status == 'occupied':
-            color = 'beige'  # folium's beige appears orange-ish
-        else:
-            color = 'gray'
-        
-        popup_html = f"""
-        <div style="width: 200px;">
-            <h4>{charger['name']}</h4>
-            <p><b>City:</b> {charger['city']}</p>
-            <p><b>Connector:</b> {charger['connector_type']}</p>
-            <p><b>Status:</b> {status.replace('_', ' ').title()}</p>
-            {f"<p><b>Distance:</b> {charger.get('distance_km', 'N/A')} km</p>" if 'distance_km' in charger else ""}
-        </div>
-        """
+        color = STATUS_COLOR.get(status, 'gray')
         
+        if cluster_rows is not None:
+            cluster_rows.append([
+                charger['latitude'], charger['longitude'], charger['name'], charger['city'],
+                charger['connector_type'], status.replace('_', ' ').title(), color
+            ])
+            continue
+        
+        popup_html = popup_template.format_map({**charger, 'status_label': status.replace('_', ' ').title()})
+        
+        # Icons can't be shared: adding one to a Marker re-parents it
         folium.Marker(
             location=[charger['latitude'], charger['longitude']],
             popup=folium.Popup(popup_html, max_width=250),
             tooltip=charger['name'],
-            icon=folium.Icon(color=color, icon='plug', prefix='fa')
+            icon=folium.Icon(color=color, **ICON_OPTIONS)
+        ).add_to(m)
+    
+    if cluster_rows is not None:
+        # Markers are queued before the cluster joins the map, so chunked loading
+        # adds them in batches instead of blocking the page on one long loop
+        FastMarkerCluster(
+            cluster_rows, callback=CLUSTER_CALLBACK,
+            chunkedLoading=True, chunkedInterval=100, chunkedDelay=50
         ).add_to(m)
     
     return m
 
+# Read-only maps skip st_folium's two-way binding and render as a static iframe
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def map_html(chargers, center_lat=36.8, center_lon=10.1, zoom=7, with_distance=False):
+    return create_map(chargers, center_lat, center_lon, zoom, with_distance).get_root().render()
+
 # ============= HEADER =============
 st.title("⚡ Volty")
 st.markdown("Powering Tunisia’s EVs")
@@ -123,6 +359,7 @@ with st.sidebar:
         if st.button("🚪 Logout"):
             st.session_state.token = None
             st.session_state.user_email = None
+            st.session_state.added_favorites = set()
             st.rerun()
     else:
         page = st.radio("Navigation", [
@@ -134,8 +371,8 @@ with st.sidebar:
 
 # ============= HOME PAGE =============
 if page == "🏠 Home":
-    # Get charger count
-    data, error = api_call("GET", "/chargers?limit=1")
+    # The total rides on the cached charger list the other pages share, so no separate count request
+    data, error = from_cache(cached_get_chargers, 100)
     total_chargers = data.get('total', 0) if data else 0
     
     col1, col2, col3 = st.columns(3)
@@ -147,24 +384,35 @@ if page == "🏠 Home":
         st.metric("✅ Status", "Online")
     
     st.markdown("---")
-    st.markdown("## 📍 All Charging Stations")
+    st.markdown("## 📍 Charging Stations")
+    
+    # Only the stations around the current map view are loaded; the
+    # map's on_change callback moves the view when the user pans or zooms
+    view = st.session_state.home_view
+    data, error = from_cache(cached_get_nearby, view['lat'], view['lon'], view['radius_km'])
+    chargers = data['nearest_chargers'] if data else []
     
-    # Load all chargers
-    data, error = api_call("GET", "/chargers?limit=100")
     if error:
         st.error(f"Error loading chargers: {error}")
-    elif data and data.get('results'):
-        chargers = data['results']
-        st.info(f"Showing {len(chargers)} charging stations")
-        m = create_map(chargers)
-        st_folium(m, width=None, height=500)
+    elif chargers:
+        st.info(f"Showing {len(chargers)} of {data['total_within_radius']} stations in this area - move the map to explore")
     else:
-        st.warning("No chargers found")
+        st.warning("No chargers in this area")
+    
+    m = create_map(chargers, center_lat=view['lat'], center_lon=view['lon'], zoom=view['zoom'])
+    st_folium(m, width=None, height=500, key="home_map",
+              returned_objects=['bounds', 'zoom'], on_change=on_home_map_move)
 
 # ============= FIND CHARGERS =============
 elif page == "🔍 Find Chargers":
     st.markdown("## 🔍 Find Charging Stations")
     
+    # Favorite state for the result buttons, fetched once per render
+    fav_ids = set()
+    if st.session_state.token:
+        favorites, _ = from_cache(cached_get_favorites, st.session_state.token)
+        fav_ids = {c['id'] for c in favorites or []}
+    
     search_mode = st.radio("Search by:", ["📍 Location", "🔎 Filters"], horizontal=True)
     
     if search_mode == "📍 Location":
@@ -287,43 +535,12 @@ elif page == "🔍 Find Chargers":
             st.success(f"✅ Found {len(results)} chargers")
             
             # Show map
-            m = create_map(results, center_lat=lat, center_lon=lon, zoom=10)
-            st_folium(m, width=None, height=400)
+            st.iframe(map_html(results, center_lat=lat, center_lon=lon, zoom=10, with_distance=True), height=400)
             
             # Show results
             st.markdown("### Results")
             for charger in results:
-                with st.expander(f"{charger['name']} - {charger['distance_km']} km"):
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.write(f"**City:** {charger['city']}")
-                        st.write(f"**Connector:** {charger['connector_type']}")
-                        st.write(f"**Status:** {charger.get('status', 'unknown').title()}")
-                    with col2:
-                        st.write(f"**Distance:** {charger['distance_km']} km")
-                        st.write(f"**Duration:** ~{charger['duration_minutes']} min")
-                        if charger.get('avg_rating'):
-                            st.write(f"**Rating:** ⭐ {charger['avg_rating']}")
-                    
-                    # Add to favorites button with clear feedback
-                    if st.session_state.token:
-                        col_btn1, col_btn2 = st.columns([1, 3])
-                        with col_btn1:
-                            if st.button("⭐ Favorite", key=f"fav_{charger['id']}", use_container_width=True):
-                                data, err = api_call("POST", f"/favorites/{charger['id']}")
-                                if err:
-                                    if "already in favorites" in str(err).lower():
-                                        st.info("Already in favorites!")
-                                    else:
-                                        st.error(f"Error: {err}")
-                                else:
-                                    st.success("✅ Added to favorites!")
-                                    st.balloons()
-                                    # Force a small delay to ensure DB commit
-                                    import time
-                                    time.sleep(0.5)
-                    else:
-                        st.info("💡 Login to add favorites")
+                nearby_result_card(charger, fav_ids)
     
     else:  # Filters
         col1, col2, col3 = st.columns(3)
@@ -382,35 +599,7 @@ elif page == "🔍 Find Chargers":
             st.success(f"✅ Found {len(results)} chargers")
             
             for charger in results:
-                with st.expander(f"{charger['name']} - {charger['city']}"):
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.write(f"**Connector:** {charger['connector_type']}")
-                        st.write(f"**Usage:** {charger['usage_type']}")
-                    with col2:
-                        st.write(f"**Status:** {charger.get('status', 'unknown').replace('_', ' ').title()}")
-                        if charger.get('avg_rating'):
-                            st.write(f"**Rating:** ⭐ {charger['avg_rating']}")
-                    
-                    # Add to favorites button
-                    if st.session_state.token:
-                        col_btn1, col_btn2 = st.columns([1, 3])
-                        with col_btn1:
-                            if st.button("⭐ Favorite", key=f"fav_filter_{charger['id']}", use_container_width=True):
-                                data, err = api_call("POST", f"/favorites/{charger['id']}")
-                                if err:
-                                    if "already in favorites" in str(err).lower():
-                                        st.info("Already in favorites!")
-                                    else:
-                                        st.error(f"Error: {err}")
-                                else:
-                                    st.success("✅ Added to favorites!")
-                                    st.balloons()
-                                    # Force a small delay to ensure DB commit
-                                    import time
-                                    time.sleep(0.5)
-                    else:
-                        st.info("💡 Login to add favorites")
+                filter_result_card(charger, fav_ids)
 
 # ============= LOGIN =============
 elif page == "🔐 Login":
@@ -463,7 +652,7 @@ elif page == "⭐ Favorites":
         st.info("💡 Tip: Add chargers to favorites from the 'Find Chargers' page by clicking the ⭐ Favorite button")
         
         with st.spinner("Loading favorites..."):
-            data, error = api_call("GET", "/favorites")
+            data, error = from_cache(cached_get_favorites, st.session_state.token)
         
         if error:
             st.error(f"Error loading favorites: {error}")
@@ -473,8 +662,7 @@ elif page == "⭐ Favorites":
             else:
                 st.success(f"✅ {len(data)} favorite charger(s)")
                 
-                m = create_map(data)
-                st_folium(m, width=None, height=400)
+                st.iframe(map_html(data, center_lat=None, center_lon=None), height=400)
                 
                 for charger in data:
                     with st.expander(f"{charger['name']} - {charger['city']}"):
@@ -489,6 +677,7 @@ elif page == "⭐ Favorites":
                         if st.button("❌ Remove from Favorites", key=f"remove_{charger['id']}", type="secondary"):
                             _, err = api_call("DELETE", f"/favorites/{charger['id']}")
                             if not err:
+                                st.session_state.added_favorites.discard(charger['id'])
                                 st.success("✅ Removed from favorites!")
                                 st.rerun()
                             else:
@@ -502,7 +691,7 @@ elif page == "🚗 My Vehicle":
         st.markdown("## 🚗 My Vehicle")
         
         # Get current vehicle
-        data, error = api_call("GET", "/users/me/vehicle")
+        data, error = from_cache(cached_get_vehicle, st.session_state.token)
         if data:
             st.info(f"Current: {data['connector_type']} | Range: {data['range_km']} km")
         
@@ -527,7 +716,7 @@ elif page == "🛣️ Plan Trip":
         st.markdown("## 🛣️ Plan Trip")
         
         # Check vehicle
-        vehicle_data, error = api_call("GET", "/users/me/vehicle")
+        vehicle_data, error = from_cache(cached_get_vehicle, st.session_state.token)
         if not vehicle_data:
             st.warning("⚠️ Please add your vehicle first!")
         else:
@@ -609,7 +798,7 @@ elif page == "🛣️ Plan Trip":
                     else:
                         st.success(f"✅ Your vehicle can make this trip without charging!")
                     
-                    waypoints = json.loads(data.get('waypoints', '[]'))
+                    waypoints = data.get('waypoints') or []
                     if waypoints:
                         st.markdown("### ⚡ Recommended Charging Stops")
                         st.info(f"💡 {len(waypoints)} charging stop(s) recommended along your route")
@@ -635,7 +824,7 @@ elif page == "📊 Statistics":
     else:
         st.markdown("## 📊 My Statistics")
         
-        data, error = api_call("GET", "/users/me/stats")
+        data, error = from_cache(cached_get_stats, st.session_state.token)
         if error:
             st.error(f"Error: {error}")
         elif data:
@@ -664,23 +853,17 @@ elif page == "📝 Write Review":
     else:
         st.markdown("## 📝 Write a Review")
         
-        data, error = api_call("GET", "/chargers?limit=100")
+        data, error = from_cache(cached_get_chargers, 100)
         if error:
             st.error(f"Error: {error}")
         elif data and data.get('results'):
-            chargers = data['results']
-            
-            selected_idx = st.selectbox(
-                "Select Charger",
-                range(len(chargers)),
-                format_func=lambda i: f"{chargers[i]['name']} - {chargers[i]['city']}"
-            )
+            label_by_id = cached_charger_labels(100)
+            charger_id = st.selectbox("Select Charger", list(label_by_id), format_func=label_by_id.get)
             
             rating = st.slider("Rating", 1, 5, 5)
             comment = st.text_area("Comment (optional)", max_chars=500)
             
             if st.button("Submit Review", type="primary"):
-                charger_id = chargers[selected_idx]['id']
                 _, error = api_call("POST", f"/chargers/{charger_id}/reviews", json={
                     "rating": rating,
                     "comment": comment if comment else None
@@ -699,14 +882,14 @@ elif page == "💬 My Reviews":
         st.markdown("## 💬 My Reviews")
         
         # Get current user ID
-        user_data, user_error = api_call("GET", "/users/me")
+        user_data, user_error = from_cache(cached_get_me, st.session_state.token)
         if user_error:
             st.error(f"Error getting user info: {user_error}")
         else:
             user_id = user_data['id']
             
             # Get all chargers to find user's reviews
-            data, error = api_call("GET", "/chargers?limit=100")
+            data, error = from_cache(cached_get_chargers, 100)
             if error:
                 st.error(f"Error loading chargers: {error}")
             elif data and data.get('results'):
@@ -795,17 +978,12 @@ elif page == "🚨 Report Charger":
     else:
         st.markdown("## 🚨 Report Charger Status")
         
-        data, error = api_call("GET", "/chargers?limit=100")
+        data, error = from_cache(cached_get_chargers, 100)
         if error:
             st.error(f"Error: {error}")
         elif data and data.get('results'):
-            chargers = data['results']
-            
-            selected_idx = st.selectbox(
-                "Select Charger",
-                range(len(chargers)),
-                format_func=lambda i: f"{chargers[i]['name']} - {chargers[i]['city']}"
-            )
+            label_by_id = cached_charger_labels(100)
+            charger_id = st.selectbox("Select Charger", list(label_by_id), format_func=label_by_id.get)
             
             issue_type = st.selectbox("Status", ["working", "broken", "occupied", "under_construction"])
             description = st.text_area("Description", max_chars=500, placeholder="Describe what you observed...")
@@ -814,7 +992,6 @@ elif page == "🚨 Report Charger":
                 if not description:
                     st.error("Please provide a description")
                 else:
-                    charger_id = chargers[selected_idx]['id']
                     _, error = api_call("POST", f"/chargers/{charger_id}/report", json={
                         "issue_type": issue_type,
                         "description": description
@@ -2,19 +2,67 @@
 Basic API tests for EV Charging Tunisia
 Run with: python -m pytest test_basic.py -v
 """
+import bcrypt
 import pytest
+import random
+import uuid
+from pathlib import Path
 from fastapi.testclient import TestClient
-from app.main import app
+import app.main as main
+from app.main import app, bounding_box, connector_matches
+from app.auth_utils import create_access_token, hash_password
+from app.database import SessionLocal
+from app.models import Charger, User
 
-client = TestClient(app)
+@pytest.fixture(scope="module")
+def client():
+    """One TestClient for the module, with startup (table creation) and shutdown around it"""
+    with TestClient(app) as c:
+        yield c
 
-def test_health_check():
+@pytest.fixture(scope="module")
+def auth_token(client):
+    """Register and log in a member shared by the module's tests"""
+    email = f"{uuid.uuid4().hex}@example.com"
+    client.post("/auth/register", json={"email": email, "password": "TestPass123"})
+    response = client.post("/auth/login", data={"username": email, "password": "TestPass123"})
+    return response.json()["access_token"]
+
+@pytest.fixture
+def member(auth_token):
+    """Bearer headers for the shared member"""
+    return {"Authorization": f"Bearer {auth_token}"}
+
+def make_charger(**fields):
+    """Insert a charger directly and return its id"""
+    db = SessionLocal()
+    charger = Charger(**{
+        "name": "Test charger", "city": "Tunis",
+        "latitude": random.uniform(33, 37), "longitude": random.uniform(8, 11),
+        "usage_type": "Public", "connector_type": "CCS (Type 2)", **fields
+    })
+    db.add(charger)
+    db.commit()
+    db.close()
+    return charger.id
+
+def auth_headers():
+    """Create a fresh member and return bearer headers for it, for tests that need a second user"""
+    db = SessionLocal()
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password=hash_password("TestPass123"))
+    db.add(user)
+    db.commit()
+    db.close()
+    token = create_access_token(data={"user_id": user.id, "role": user.role})
+    return {"Authorization": f"Bearer {token}"}
+
+def test_health_check(client):
     """Test API health endpoint"""
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
 
-def test_root_endpoint():
+def test_root_endpoint(client):
     """Test API root endpoint"""
     response = client.get("/")
     assert response.status_code == 200
@@ -23,7 +71,7 @@ def test_root_endpoint():
     assert "version" in data
     assert data["status"] == "running"
 
-def test_get_chargers():
+def test_get_chargers(client):
     """Test get chargers endpoint"""
     response = client.get("/chargers?limit=5")
     assert response.status_code == 200
@@ -32,7 +80,29 @@ def test_get_chargers():
     assert "results" in data
     assert isinstance(data["results"], list)
 
-def test_charger_search():
+def test_chargers_etag(client, member):
+    """Test conditional GET on the charger list"""
+    response = client.get("/chargers?limit=5")
+    etag = response.headers["etag"]
+    response = client.get("/chargers?limit=5", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    response = client.get("/chargers?limit=5", headers={"If-None-Match": f'"other", {etag.removeprefix("W/")}'})
+    assert response.status_code == 304
+    assert client.get("/chargers?limit=5", headers={"If-None-Match": "*"}).status_code == 304
+
+    client.post(f"/chargers/{make_charger()}/reviews", json={"rating": 4}, headers=member)
+    response = client.get("/chargers?limit=5", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["etag"] != etag
+
+def test_chargers_gzip(client):
+    """Test large charger lists are compressed for clients that accept gzip"""
+    for _ in range(5):
+        make_charger()
+    response = client.get("/chargers?limit=20", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["results"]) >= 5
+
+def test_charger_search(client):
     """Test charger search endpoint"""
     response = client.get("/chargers/search?city=Tunis&limit=5")
     assert response.status_code == 200
@@ -40,7 +110,7 @@ def test_charger_search():
     assert "total" in data
     assert "results" in data
 
-def test_register_user():
+def test_register_user(client):
     """Test user registration"""
     test_user = {
         "email": "test@example.com",
@@ -50,7 +120,7 @@ def test_register_user():
     # Should succeed or fail with 400 if user exists
     assert response.status_code in [200, 400]
 
-def test_invalid_login():
+def test_invalid_login(client):
     """Test login with invalid credentials"""
     response = client.post("/auth/login", data={
         "username": "invalid@example.com",
@@ -58,7 +128,117 @@ def test_invalid_login():
     })
     assert response.status_code == 401
 
-def test_protected_endpoint_without_auth():
+def test_protected_endpoint_without_auth(client):
     """Test protected endpoint without authentication"""
     response = client.get("/users/me")
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+def test_no_hardcoded_secret_key():
+    """Test the JWT secret only comes from settings"""
+    for path in (Path(__file__).parent / "app").glob("*.py"):
+        assert "super-secret-key-change-this" not in path.read_text()
+
+def test_review_aggregates_follow_writes(client, member):
+    """Test the stored rating and review count after adding, editing and deleting reviews"""
+    charger_id = make_charger()
+    headers, other_headers = member, auth_headers()
+
+    review_id = client.post(f"/chargers/{charger_id}/reviews", json={"rating": 4}, headers=headers).json()["review_id"]
+    client.post(f"/chargers/{charger_id}/reviews", json={"rating": 2}, headers=other_headers)
+    charger = client.get(f"/chargers/{charger_id}").json()
+    assert (charger["avg_rating"], charger["review_count"]) == (3.0, 2)
+
+    client.put(f"/reviews/{review_id}", json={"rating": 5}, headers=headers)
+    assert client.get(f"/chargers/{charger_id}").json()["avg_rating"] == 3.5
+
+    client.delete(f"/reviews/{review_id}", headers=headers)
+    charger = client.get(f"/chargers/{charger_id}").json()
+    assert (charger["avg_rating"], charger["review_count"]) == (2.0, 1)
+
+def test_connector_filter_survives_report(client, member):
+    """Test a reported charger still matches its connector filter"""
+    charger_id = make_charger(connector_type="CCS Type-2")
+    response = client.post(f"/chargers/{charger_id}/report",
+                           json={"issue_type": "broken", "description": "Screen is dead"},
+                           headers=member)
+    assert response.status_code == 200
+
+    db = SessionLocal()
+    charger = db.get(Charger, charger_id)
+    matches = db.query(Charger.id).filter(Charger.id == charger_id, connector_matches("ccs type-2")).all()
+    db.close()
+    assert (charger.status, charger.report_count) == ("broken", 1)
+    assert matches == [(charger_id,)]
+
+def test_bounding_box_across_antimeridian():
+    """Test a search box crossing ±180° spans every longitude"""
+    assert bounding_box(0, 179.5, 200)[2:] == (-180.0, 180.0)
+    assert bounding_box(0, -179.9, 20)[2:] == (-180.0, 180.0)
+    min_lat, max_lat, min_lon, max_lon = bounding_box(36, 10, 50)
+    assert min_lat < 36 < max_lat and min_lon < 10 < max_lon
+
+def test_favorite_duplicate_is_noop(client, member):
+    """Test adding the same favorite twice keeps a single row"""
+    charger_id = make_charger()
+    assert client.post(f"/favorites/{charger_id}", headers=member).json()["message"] == "Charger added to favorites"
+    assert client.post(f"/favorites/{charger_id}", headers=member).json()["message"] == "Charger already in favorites"
+    assert client.get(f"/favorites/check/{charger_id}", headers=member).json()["is_favorite"] is True
+    assert client.post("/favorites/999999", headers=member).status_code == 404
+
+def test_mark_review_helpful_returns_count(client, member):
+    """Test the helpful vote returns the incremented count"""
+    charger_id = make_charger()
+    review_id = client.post(f"/chargers/{charger_id}/reviews", json={"rating": 5}, headers=member).json()["review_id"]
+    assert client.post(f"/reviews/{review_id}/helpful", headers=member).json()["helpful_count"] == 1
+    assert client.post(f"/reviews/{review_id}/helpful", headers=member).json()["helpful_count"] == 2
+    assert client.post("/reviews/999999/helpful", headers=member).status_code == 404
+
+def test_login_rehashes_bcrypt_password(client):
+    """Test a legacy bcrypt hash is replaced with argon2 on login"""
+    email = f"{uuid.uuid4().hex}@example.com"
+    db = SessionLocal()
+    user = User(email=email, hashed_password=bcrypt.hashpw(b"TestPass123", bcrypt.gensalt()).decode())
+    db.add(user)
+    db.commit()
+    db.close()
+
+    response = client.post("/auth/login", data={"username": email, "password": "TestPass123"})
+    assert response.status_code == 200
+
+    db = SessionLocal()
+    assert db.get(User, user.id).hashed_password.startswith("$argon2")
+    db.close()
+    assert client.post("/auth/login", data={"username": email, "password": "TestPass123"}).status_code == 200
+
+def test_report_recomputes_status_in_background(client, member):
+    """Test reports update the charger status once the response is sent"""
+    charger_id = make_charger()
+    response = client.post(f"/chargers/{charger_id}/report",
+                           json={"issue_type": "working", "description": "Charging fine"},
+                           headers=member)
+    assert response.status_code == 200
+    assert client.get(f"/chargers/{charger_id}").json()["status"] == "working"
+
+    client.post(f"/chargers/{charger_id}/report",
+                json={"issue_type": "broken", "description": "Cable cut"},
+                headers=auth_headers())
+    assert client.get(f"/chargers/{charger_id}").json()["status"] == "broken"
+    assert charger_id not in main._status_pending
+
+def test_trip_plan_prefers_working_chargers_anywhere(client, member):
+    """Test usable chargers are only planned when no compatible charger is working"""
+    plug = f"Plug-{uuid.uuid4().hex}"
+    near_id = make_charger(connector_type=plug, latitude=36.3, longitude=10.0)
+    far_id = make_charger(connector_type=plug, latitude=30.0, longitude=0.0, status="working")
+    main.route_cache[main.route_cache_key(36.0, 10.0, 37.0, 10.0)] = {"distance_km": 120.0, "duration_minutes": 90.0}
+    client.post("/users/me/vehicle", json={"connector_type": plug, "range_km": 50}, headers=member)
+    trip = {"start_lat": 36.0, "start_lon": 10.0, "end_lat": 37.0, "end_lon": 10.0}
+
+    assert client.post("/trips/plan", json=trip, headers=member).json()["waypoints"] == []
+
+    db = SessionLocal()
+    db.get(Charger, far_id).status = "broken"
+    db.commit()
+    db.close()
+    waypoints = client.post("/trips/plan", json=trip, headers=member).json()["waypoints"]
+    assert [w["charger_id"] for w in waypoints] == [near_id]